@@ -4,100 +4,211 @@
 #
 # Requires Python Imaging Library (PIL)
 #
-# To add a new font, create a new FONT dictionary and tweak the parameters
-# until the output .png looks correct.
+# To add a new font, add an entry to FONTS (or pass a spec on the command
+# line) and tweak the parameters until the output .png looks correct.
 # Monospaced fonts work best, but some variable-width ones work well too.
+# Fonts marked proportional get each glyph's advance width measured from
+# its pixels, so display.font lays them out without wasted columns.
 #
-# Once the png file looks good, you can simply include the .h file in your
-# project and use it. (how you use it is up to you)
+# Once the png file looks good, the generated font module is written to
+# lib/ (font_5x5.py for 5x5.ttf) and can be used with display.font:
+#
+#   import font_5x5
+#   ledfont = display.font(font_5x5.FONT)
+#
+# Several fonts are converted at once, one process per core:
+#
+#   python3 fontgen.py 5x5 pzim3x5 zxpix.ttf:10:-2:6:8
+#   python3 fontgen.py --all --out-dir /tmp/fonts
 #
 
 from PIL import Image, ImageFont, ImageDraw
+import argparse
+import multiprocessing
 import os.path
-
-# MONOSPACE:
-#FONT = {'fname': r'pzim3x5.ttf', 'size': 9, 'yoff':1, 'w': 3, 'h': 8}
-FONT = {'fname': r'5x5.ttf', 'size': 10, 'yoff':-4, 'w': 5, 'h': 5}
-#FONT = {'fname': r'BMSPA.ttf', 'size': 9, 'yoff':0, 'w': 8, 'h': 8} #NOTE: add .upper() because lower characters are broken
-#FONT = {'fname': r'BMplain.ttf', 'size': 7, 'yoff':0, 'w': 6, 'h': 8}
-#FONT = {'fname': r'bubblesstandard.ttf', 'size': 15, 'yoff':-1, 'w': 7, 'h': 8}
-#FONT = {'fname': r'7linedigital.ttf', 'size': 8, 'yoff':0, 'w': 4, 'h': 8}  # 7-seg. NOTE: can't display certain letters like 'M'
-#FONT = {'fname': r'HUNTER.ttf', 'size': 9, 'yoff':-1, 'w': 8, 'h': 8}
-#FONT = {'fname': r'm38.ttf', 'size': 8, 'yoff':-0, 'w': 8, 'h': 8}
-#FONT = {'fname': r'formplex12.ttf', 'size': 11, 'yoff':0, 'w': 8, 'h': 8}
-#FONT = {'fname': r'sloth.ttf', 'size': 15, 'yoff':-2, 'w': 6, 'h': 8}
-
-# VARIABLE-WIDTH:
-#FONT = {'fname': r'SUPERDIG.ttf', 'size': 9, 'yoff':-1, 'w': 6, 'h': 8} # Missing some symbols
-#FONT = {'fname': r'tama_mini02.TTF', 'size': 11, 'yoff': -2, 'w': 5, 'h': 8}
-#FONT = {'fname': r'homespun.ttf', 'size': 9, 'yoff':-1, 'w': 7, 'h': 8}  # Non-monospaced
-#FONT = {'fname': r'zxpix.ttf', 'size': 10, 'yoff':-2, 'w': 6, 'h': 8}
-#FONT = {'fname': r'Minimum.ttf', 'size': 16, 'yoff':-8, 'w': 6, 'h': 8}
-#FONT = {'fname': r'Minimum+1.ttf', 'size': 16, 'yoff':-8, 'w': 7, 'h': 8}
-#FONT = {'fname': r'HISKYF21.ttf', 'size': 9, 'yoff':0, 'w': 6, 'h': 8}
-#FONT = {'fname': r'renew.ttf', 'size': 8, 'yoff':-2, 'w': 7, 'h': 8}
-#FONT = {'fname': r'acme_5_outlines.ttf', 'size': 8, 'yoff':-5, 'w': 6, 'h': 8}
-#FONT = {'fname': r'haiku.ttf', 'size': 11, 'yoff':-2, 'w': 6, 'h': 8}
-#FONT = {'fname': r'aztech.ttf', 'size': 16, 'yoff':-1, 'w': 6, 'h': 8}
-#FONT = {'fname': r'Commo-Monospaced.otf', 'size': 8, 'yoff':-6, 'w': 8, 'h': 8}
-#FONT = {'fname': r'crackers.ttf', 'size': 21, 'yoff':-4, 'w': 6, 'h': 8}
-#FONT = {'fname': r'Blokus.otf', 'size': 9, 'yoff':-2, 'w': 6, 'h': 8}
-
-#TODO: Support variable-width character fonts
-
-FONT_FILE = FONT['fname']
-FONT_SIZE = FONT['size']
-FONT_Y_OFFSET = FONT.get('yoff', 0)
-
-CHAR_WIDTH = FONT.get('w', 5)
-CHAR_HEIGHT = FONT.get('h', 8)
+import re
+import sys
+
+FONTS = {
+    # MONOSPACE:
+    'pzim3x5': {'fname': r'pzim3x5.ttf', 'size': 9, 'yoff':1, 'w': 3, 'h': 8},
+    '5x5': {'fname': r'5x5.ttf', 'size': 10, 'yoff':-4, 'w': 5, 'h': 5, 'proportional': True},
+    'bmspa': {'fname': r'BMSPA.ttf', 'size': 9, 'yoff':0, 'w': 8, 'h': 8, 'upper': True}, # lower characters are broken
+    'bmplain': {'fname': r'BMplain.ttf', 'size': 7, 'yoff':0, 'w': 6, 'h': 8},
+    'bubblesstandard': {'fname': r'bubblesstandard.ttf', 'size': 15, 'yoff':-1, 'w': 7, 'h': 8},
+    '7linedigital': {'fname': r'7linedigital.ttf', 'size': 8, 'yoff':0, 'w': 4, 'h': 8},  # 7-seg. NOTE: can't display certain letters like 'M'
+    'hunter': {'fname': r'HUNTER.ttf', 'size': 9, 'yoff':-1, 'w': 8, 'h': 8},
+    'm38': {'fname': r'm38.ttf', 'size': 8, 'yoff':-0, 'w': 8, 'h': 8},
+    'formplex12': {'fname': r'formplex12.ttf', 'size': 11, 'yoff':0, 'w': 8, 'h': 8},
+    'sloth': {'fname': r'sloth.ttf', 'size': 15, 'yoff':-2, 'w': 6, 'h': 8},
+
+    # VARIABLE-WIDTH:
+    'superdig': {'fname': r'SUPERDIG.ttf', 'size': 9, 'yoff':-1, 'w': 6, 'h': 8, 'proportional': True}, # Missing some symbols
+    'tama_mini02': {'fname': r'tama_mini02.TTF', 'size': 11, 'yoff': -2, 'w': 5, 'h': 8, 'proportional': True},
+    'homespun': {'fname': r'homespun.ttf', 'size': 9, 'yoff':-1, 'w': 7, 'h': 8, 'proportional': True},  # Non-monospaced
+    'zxpix': {'fname': r'zxpix.ttf', 'size': 10, 'yoff':-2, 'w': 6, 'h': 8, 'proportional': True},
+    'minimum': {'fname': r'Minimum.ttf', 'size': 16, 'yoff':-8, 'w': 6, 'h': 8, 'proportional': True},
+    'minimum_1': {'fname': r'Minimum+1.ttf', 'size': 16, 'yoff':-8, 'w': 7, 'h': 8, 'proportional': True},
+    'hiskyf21': {'fname': r'HISKYF21.ttf', 'size': 9, 'yoff':0, 'w': 6, 'h': 8, 'proportional': True},
+    'renew': {'fname': r'renew.ttf', 'size': 8, 'yoff':-2, 'w': 7, 'h': 8, 'proportional': True},
+    'acme_5_outlines': {'fname': r'acme_5_outlines.ttf', 'size': 8, 'yoff':-5, 'w': 6, 'h': 8, 'proportional': True},
+    'haiku': {'fname': r'haiku.ttf', 'size': 11, 'yoff':-2, 'w': 6, 'h': 8, 'proportional': True},
+    'aztech': {'fname': r'aztech.ttf', 'size': 16, 'yoff':-1, 'w': 6, 'h': 8, 'proportional': True},
+    'commo_monospaced': {'fname': r'Commo-Monospaced.otf', 'size': 8, 'yoff':-6, 'w': 8, 'h': 8},
+    'crackers': {'fname': r'crackers.ttf', 'size': 21, 'yoff':-4, 'w': 6, 'h': 8, 'proportional': True},
+    'blokus': {'fname': r'Blokus.otf', 'size': 9, 'yoff':-2, 'w': 6, 'h': 8, 'proportional': True},
+}
+DEFAULT_FONTS = ['5x5']
 
 FONT_BEGIN = ' '
 FONT_END = '~'
-#FONTSTR = ''.join(chr(x).upper() for x in range(ord(FONT_BEGIN), ord(FONT_END)+1))
-FONTSTR = ''.join(chr(x) for x in range(ord(FONT_BEGIN), ord(FONT_END)+1))
-
-OUTPUT_NAME = os.path.splitext(FONT_FILE)[0] + '_font'
-OUTPUT_PNG = OUTPUT_NAME + '.png'
-OUTPUT_H = OUTPUT_NAME + '.py'
-
-GLYPH_WIDTH = CHAR_WIDTH + 1
-
-WIDTH = GLYPH_WIDTH * len(FONTSTR)
-HEIGHT = CHAR_HEIGHT
-
-img = Image.new("RGBA", (WIDTH, HEIGHT), (255,255,255))
-#fnt = ImageFont.load_default()
-fnt = ImageFont.truetype(FONT_FILE, FONT_SIZE)
-
-drw = ImageDraw.Draw(img)
-#drw.fontmode = 1
-
-for i in range(len(FONTSTR)):
-    drw.text((i*GLYPH_WIDTH,FONT_Y_OFFSET), FONTSTR[i], (0,0,0), font=fnt)
-
-img.save(OUTPUT_PNG)
-
-#### Convert to C-header format
-f = open(OUTPUT_H, 'w')
-num_chars = len(FONTSTR)
-f.write('font = [ \n')
-
-chars = []
-for i in range(num_chars):
-    ints = []
-    for y in range(CHAR_HEIGHT):
-        startx = i*GLYPH_WIDTH
-        val = 0
-        for x in range(startx,startx+CHAR_WIDTH):
-            rgb = img.getpixel((x,y))
-            val = (val << 1) | (0x01 if rgb[0] == 0 else 0)
-        val = val << (8 - CHAR_WIDTH)
-        ints.append(bin(val))
-    c = FONTSTR[i]
-    if c == '\\': c = '"\\"' # bugfix
-    f.write('\t[%s], # %s\n' % (','.join(ints), c))
-
-f.write('\t[%s]\n' % (','.join(['0x00']*CHAR_WIDTH)))
-f.write(']\n\n')
-f.close()
+
+FONT_DIR = os.path.dirname(os.path.abspath(__file__))
+LIB_DIR = os.path.join(FONT_DIR, '..', 'lib')
+
+
+def parse_spec(spec):
+    # A FONTS name, or fname:size[:yoff[:w[:h]]]
+    if spec in FONTS:
+        return FONTS[spec]
+    parts = spec.split(':')
+    if len(parts) < 2:
+        raise ValueError('unknown font %r, expected a preset or fname:size[:yoff[:w[:h]]]' % spec)
+    font = {'fname': parts[0]}
+    for key, value in zip(('size', 'yoff', 'w', 'h'), parts[1:]):
+        font[key] = int(value)
+    return font
+
+
+def font_path(fname):
+    # Relative to the current directory, else to this script's
+    if os.path.exists(fname):
+        return fname
+    return os.path.join(FONT_DIR, fname)
+
+
+def render_strip(font, fontstr):
+    # Every glyph side by side, one column apart, black on white
+    char_width = font.get('w', 5)
+    glyph_width = char_width + 1
+    img = Image.new("RGBA", (glyph_width * len(fontstr), font.get('h', 8)), (255,255,255))
+    #fnt = ImageFont.load_default()
+    fnt = ImageFont.truetype(font_path(font['fname']), font['size'])
+
+    drw = ImageDraw.Draw(img)
+    #drw.fontmode = 1
+
+    for i in range(len(fontstr)):
+        drw.text((i*glyph_width, font.get('yoff', 0)), fontstr[i], (0,0,0), font=fnt)
+    return img
+
+
+def glyph_bitmaps(img, font, count):
+    # Row bytes of every glyph, leftmost column in bit 7. The strip is
+    # thresholded in one pass (only pure black is lit) and PIL packs the
+    # rows of each glyph into bytes.
+    char_width = font.get('w', 5)
+    glyph_width = char_width + 1
+    lit = img.getchannel('R').point(lambda v: 255 if v == 0 else 0, '1')
+    return [lit.crop((i*glyph_width, 0, i*glyph_width + char_width, img.height)).tobytes()
+            for i in range(count)]
+
+
+def glyph_widths(bitmaps, font):
+    # Advance width of every glyph: up to its rightmost lit column. Blank
+    # glyphs such as the space get half the cell.
+    widths = []
+    for rows in bitmaps:
+        columns = 0
+        for row in rows:
+            columns |= row
+        if columns:
+            widths.append(8 - ((columns & -columns).bit_length() - 1))
+        else:
+            widths.append(max(1, font.get('w', 5) // 2))
+    return widths
+
+
+def write_module(path, font, fontstr, bitmaps, widths = None):
+    # Header: glyph width, height, first character, glyph count, flags (bit 0:
+    # per-glyph widths follow the bitmaps). Then height bytes per glyph, one
+    # per row with the leftmost column in bit 7, then the widths.
+    f = open(path, 'w')
+    f.write('# %s, generated by font/fontgen.py\n\n' % os.path.basename(font['fname']))
+    f.write('FONT = (\n')
+    f.write("    b'%s'\n" % ''.join('\\x%02x' % v for v in
+                                  (font.get('w', 5), font.get('h', 8), ord(FONT_BEGIN), len(bitmaps),
+                                   0 if widths is None else 1)))
+    for i, rows in enumerate(bitmaps):
+        f.write("    b'%s' # %s\n" % (''.join('\\x%02x' % v for v in rows), fontstr[i]))
+    if widths is not None:
+        f.write('    # Advance widths\n')
+        for i in range(0, len(widths), 16):
+            f.write("    b'%s'\n" % ''.join('\\x%02x' % v for v in widths[i:i + 16]))
+    f.write(')\n')
+    f.close()
+
+
+def convert(job):
+    # One font to a preview png and a font module. Returns the paths, or
+    # the error for fonts that could not be converted.
+    font, png_dir, out_dir = job
+    if font.get('w', 5) > 8:
+        return 'glyphs wider than 8 columns are not supported'
+    fontstr = ''.join(chr(x) for x in range(ord(FONT_BEGIN), ord(FONT_END)+1))
+    if font.get('upper'):
+        fontstr = fontstr.upper()
+    output_name = 'font_' + re.sub(r'\W', '_', os.path.splitext(os.path.basename(font['fname']))[0]).lower()
+    output_png = os.path.join(png_dir, output_name + '.png')
+    output_py = os.path.join(out_dir, output_name + '.py')
+    try:
+        img = render_strip(font, fontstr)
+        img.save(output_png)
+        bitmaps = glyph_bitmaps(img, font, len(fontstr))
+        widths = glyph_widths(bitmaps, font) if font.get('proportional') else None
+        write_module(output_py, font, fontstr, bitmaps, widths)
+    except OSError as e:
+        return str(e)
+    return (output_png, output_py)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert fonts to png previews and display.font modules')
+    parser.add_argument('fonts', nargs='*', default=DEFAULT_FONTS,
+                        help='FONTS names or fname:size[:yoff[:w[:h]]] (default: %s)' % ' '.join(DEFAULT_FONTS))
+    parser.add_argument('--all', action='store_true', help='convert every font in FONTS')
+    parser.add_argument('-p', '--proportional', action='store_true',
+                        help='measure advance widths for every font, not just those marked proportional')
+    parser.add_argument('--png-dir', default='.', help='where to write the previews (default: .)')
+    parser.add_argument('--out-dir', default=LIB_DIR, help='where to write the modules (default: lib/)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='conversion processes (default: one per core)')
+    args = parser.parse_args()
+
+    specs = sorted(FONTS) if args.all else args.fonts
+    try:
+        fonts = [parse_spec(spec) for spec in specs]
+    except ValueError as e:
+        parser.error(str(e))
+    if args.proportional:
+        fonts = [dict(font, proportional=True) for font in fonts]
+    jobs = [(font, args.png_dir, args.out_dir) for font in fonts]
+
+    if args.jobs > 1 and len(jobs) > 1:
+        with multiprocessing.Pool(min(args.jobs, len(jobs))) as pool:
+            results = pool.map(convert, jobs)
+    else:
+        results = [convert(job) for job in jobs]
+
+    failed = 0
+    for spec, result in zip(specs, results):
+        if isinstance(result, str):
+            print('%s: %s' % (spec, result))
+            failed += 1
+        else:
+            print('%s: %s, %s' % (spec, result[0], result[1]))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
 import time
 
 # AS 1130 driver goes here
-from micropython import const
+try:
+    from micropython import const
+except ImportError:
+    # Running on CPython, e.g. against the emulator
+    def const(x):
+        return x
 
 # Register definitions
 REGREG      = const(0xFD)
@@ -42,34 +47,336 @@ AS_CONFIG   = const(0x06)
 #INT_FRAME   = const(0x08)
 SHUTDOWN    = const(0x09)
 #I2CMONITOR  = const(0x0A)
-#CLK_SYNC    = const(0x0B)
+CLK_SYNC    = const(0x0B)
 #INT_STATUS  = const(0x0E)
 #AS_STATUS   = const(0x0F)
 #OPENLED     = const(0x20)
 
+# Clock synchronization options
+SYNC_OUT    = const(0b01)   # Drive the SYNC pin with this chip's clock
+SYNC_IN     = const(0b10)   # Run from the clock on the SYNC pin
+
 # Various constants
 MILLIAMPS_FACTOR = 255.0 / 30
 NUM_FRAMES = const(36)
+MAX_PWM_SETS = const(8)         # Sets a frame can select in its PWM set bits
+FRAME_BYTES = const(0x18)       # On/off registers per frame
+PWM_PAGE_BYTES = const(0x9C)    # Blink bits followed by PWM values
+MERGE_GAP = const(4)            # Unchanged bytes worth resending to save a transaction
+LEDS_PER_SEGMENT = const(10)    # On/off bits used in each register pair
+
+# Lookup tables for each frame geometry, see led_tables()
+_led_tables = {}
+
+GAMMA = 2.2             # Brightness to PWM value curve, see brightness_table()
+NOT_UNIFORM = const(-1) # The lit LEDs of a frame differ in brightness
+
+def led_tables(width, height):
+    # Map pixel x + y * width of a frame to its on/off register, bit mask
+    # and PWM id. LEDs are numbered down each column, ten to a register
+    # pair. Built once per geometry.
+    key = (width, height)
+    tables = _led_tables.get(key)
+    if tables is None:
+        if width * height > (FRAME_BYTES // 2) * LEDS_PER_SEGMENT:
+            raise ValueError("Frame is too large for the AS1130")
+        registers = bytearray(width * height)
+        masks = bytearray(width * height)
+        pwm_ids = bytearray(width * height)
+        for y in range(height):
+            for x in range(width):
+                led = x * height + y
+                bit = led % LEDS_PER_SEGMENT
+                registers[x + y * width] = (led // LEDS_PER_SEGMENT) * 2 + (bit >> 3)
+                masks[x + y * width] = 1 << (bit & 7)
+                pwm_ids[x + y * width] = FRAME_BYTES + led
+        tables = (registers, masks, pwm_ids)
+        _led_tables[key] = tables
+    return tables
+
+def brightness_table(level = 255, gamma = GAMMA, table = None):
+    # PWM value for each brightness 0-255: gamma corrected, then scaled
+    # to level (0-255). Lit LEDs stay lit unless level is 0. Fills table
+    # in place if given.
+    if table is None:
+        table = bytearray(256)
+    table[0] = 0
+    for value in range(1, 256):
+        pwm = int(level * (value / 255) ** gamma + 0.5)
+        table[value] = pwm if pwm or not level else 1
+    return table
+
+_default_table = brightness_table()
+
+def encode_frame(buffer, offset, stride, width, height, onoff, pwm = None, table = None):
+    # Encode a width x height window of a brightness buffer, starting at
+    # offset with rows stride bytes apart, into a frame's on/off image
+    # and, given a PWM page image, the PWM values looked up in table
+    # (brightness_table() by default) in a single pass. Returns the PWM
+    # value every lit LED got, NOT_UNIFORM if they differ, or None if no
+    # LED is lit or there is no PWM image.
+    registers, masks, pwm_ids = led_tables(width, height)
+    for counter in range(FRAME_BYTES):
+        onoff[counter] = 0
+    uniform = None
+    index = 0
+    if pwm is None:
+        for y in range(height):
+            position = offset + y * stride
+            for x in range(width):
+                if buffer[position + x]:
+                    onoff[registers[index]] |= masks[index]
+                index += 1
+        return uniform
+
+    if table is None:
+        table = _default_table
+    for y in range(height):
+        position = offset + y * stride
+        for x in range(width):
+            value = buffer[position + x]
+            level = table[value]
+            pwm[pwm_ids[index]] = level
+            if value:
+                onoff[registers[index]] |= masks[index]
+                if uniform != level:
+                    uniform = level if uniform is None else NOT_UNIFORM
+            index += 1
+    return uniform
+
+class FrameAllocator:
+    """Keeps titles resident in ranges of hardware frames, evicting the least recently used"""
+    def __init__(self, num_frames = NUM_FRAMES):
+        self.num_frames = num_frames
+        # key -> [last use, first frame, number of frames]
+        self._ranges = {}
+        self._clock = 0
+
+    def lookup(self, key):
+        # The (first frame, number of frames) holding key, or None
+        entry = self._ranges.get(key)
+        if entry is None:
+            return None
+        self._clock += 1
+        entry[0] = self._clock
+        return (entry[1], entry[2])
+
+    def allocate(self, key, frames, keep = None):
+        # Find room for frames frames for key, evicting least recently
+        # used titles other than keep until they fit. If key is keep its
+        # old frames stay untouched until the new ones replace them.
+        if frames > self.num_frames:
+            raise ValueError("Not enough hardware frames")
+        # An existing entry stays in place, taking up no frames, and is
+        # reused so uploading a title again does not allocate
+        entry = self._ranges.get(key)
+        if entry is not None and key != keep:
+            entry[2] = 0
+        first = self._find_gap(frames)
+        while first is None:
+            oldest = None
+            for other, other_entry in self._ranges.items():
+                if other != keep and other != key and \
+                   (oldest is None or other_entry[0] < self._ranges[oldest][0]):
+                    oldest = other
+            if oldest is None:
+                if key != keep:
+                    self.discard(key)
+                raise ValueError("Not enough hardware frames")
+            del self._ranges[oldest]
+            first = self._find_gap(frames)
+        if entry is None:
+            entry = [0, 0, 0]
+            self._ranges[key] = entry
+        self._clock += 1
+        entry[0] = self._clock
+        entry[1] = first
+        entry[2] = frames
+        return first
+
+    def release(self, first, frames):
+        # Forget every title using any of these frames
+        while True:
+            found = None
+            for key, entry in self._ranges.items():
+                if entry[1] < first + frames and first < entry[1] + entry[2]:
+                    found = key
+                    break
+            if found is None:
+                return
+            del self._ranges[found]
+
+    def discard(self, key):
+        # Forget key, whose content has changed
+        self._ranges.pop(key, None)
+
+    def discard_all_but(self, key):
+        # Forget every title but key
+        entry = self._ranges.get(key)
+        self._ranges = {}
+        if entry is not None:
+            self._ranges[key] = entry
+
+    def clear(self):
+        self._ranges = {}
+
+    def _find_gap(self, frames):
+        # First free run of frames frames, or None. Walks the ranges in
+        # frame order by picking the next one each time, without sorting
+        # into a new list.
+        position = 0
+        while True:
+            next_first = self.num_frames
+            next_end = self.num_frames
+            for entry in self._ranges.values():
+                if entry[2] and position <= entry[1] < next_first:
+                    next_first = entry[1]
+                    next_end = entry[1] + entry[2]
+            if next_first - position >= frames:
+                return position
+            if next_first == self.num_frames:
+                return None
+            position = next_end
 
 class AS1130:
     """Driver base for the AS1130 LED Matrix Controller."""
     def __init__(self):
-        # Set up in a sensible default configuration.
+        # Titles kept in hardware frames, which frames are on display, and
+        # the frames staged to be shown next
+        self.frame_cache = FrameAllocator(NUM_FRAMES)
+        self._shown = None
+        self._staged = False
+        self._staged_first = 0
+        self._staged_frames = 0
+        self._staged_key = None
+        # Frame cache keys for uploads without a key of their own, used in
+        # turn so an upload never lands on the frames on display
+        self._buffer_keys = (object(), object())
+        self._buffer_key = 0
+        self._first_frame = 0
+        self._movie_playing = False
+        self._scrolling = True
+        self._frame_delay = 1
+        self.num_frames = NUM_FRAMES
+        self.num_pwm_sets = 1
+
+        # Host side copy of what the frame and PWM RAM hold, so uploads
+        # only need to send what changed
+        self._frame_shadow = bytearray(NUM_FRAMES * FRAME_BYTES)
+        self._frame_valid = bytearray(NUM_FRAMES)
+        self._pwm_shadow = {}   # PWM set -> page copy, made on first use
+        self._pwm_valid = bytearray(MAX_PWM_SETS)
+        # Scratch images every upload is encoded into
+        self._onoff_image = bytearray(FRAME_BYTES)
+        self._pwm_image = bytearray(PWM_PAGE_BYTES)
+        # Brightness to PWM value table, see set_brightness()
+        self._pwm_table = brightness_table()
+        # Per PWM set: the PWM value all of its first _pwm_uniform_leds
+        # LEDs hold, or NOT_UNIFORM, so frames of one brightness need no
+        # PWM writes when their set holds it already
+        self._pwm_uniform = [NOT_UNIFORM] * MAX_PWM_SETS
+        self._pwm_uniform_leds = bytearray(MAX_PWM_SETS)
+        # Per PWM set: key of the PWM upload whose frames use it, or None
+        # while it holds full brightness for on/off frames. The sets the
+        # PWM upload in progress has taken are the first _upload_set_count
+        # of _upload_sets.
+        self._pwm_owners = [None] * MAX_PWM_SETS
+        self._upload_sets = bytearray(MAX_PWM_SETS)
+        self._upload_set_count = 0
+        self._upload_key = None
+        self._blank_image = bytearray(FRAME_BYTES)  # All LEDs off, PWM set 0
+        self._stats = None  # instrument.CallStats while enable_stats() is on
+
+        self._current = int(18 * MILLIAMPS_FACTOR)
+        self._clock_sync = 0
+
+        # Set up in a sensible default configuration, see set_ram_config()
         time.sleep(0.25)
-        # reset
-        self.control_write(SHUTDOWN, 0b00000000)  # Turn on the display
-
         self.set_ram_config(1)
-        self.set_current(18)
-        self.control_write(DSP_OPTION, 0b11101011)
-        self.control_write(MOVIE, 0b00000000)      # Turn movies off
-        self.control_write(MOVIEMODE, 0b00000000)
-        self.control_write(PICTURE, 0b00000000)   # Display frame 1
-        self.control_write(FRAMETIME, 0b01110001)
-        self.control_write(SHUTDOWN, 0b00000011)  # Turn on the display
         print("Init done")
 
+    # Public calls enable_stats() counts and times
+    STATS_CALLS = ('draw_framebuffer', 'draw_frame_images', 'stage_framebuffer',
+                   'stage_frame_images', 'show_cached', 'stage_cached', 'swap',
+                   'play_movie', 'set_scrolling', 'set_frame_delay', 'set_current',
+                   'set_brightness', 'set_ram_config', 'control_write')
+
+    def enable_stats(self, enable = True):
+        # Count and time the public calls and the bus traffic each one
+        # causes, see stats(). The methods are only wrapped while enabled,
+        # so there is no cost otherwise. Returns the instrument.CallStats
+        # (to time other calls with), or None when disabled.
+        if not enable:
+            if self._stats is not None:
+                self._stats.unwrap()
+                self._stats = None
+            return None
+        if self._stats is None:
+            import instrument
+            stats = instrument.CallStats()
+            for name in self.STATS_CALLS:
+                stats.wrap(self, name)
+            self._count_bus(stats, instrument)
+            self._stats = stats
+        return self._stats
+
+    def stats(self):
+        # Snapshot of the counters per call, or None if not enabled
+        if self._stats is None:
+            return None
+        return self._stats.snapshot()
+
+    def _count_bus(self, stats, instrument):
+        # Wrap the bus writes to count transactions and bytes, and among
+        # them the control, frame and PWM writes by the page selected
+        selected = [None]
+
+        def count(length):
+            record = stats.current()
+            record[instrument.TRANSACTIONS] += 1
+            record[instrument.BYTES] += length + 1
+            page = selected[0]
+            if page == CONTROL:
+                record[instrument.CONTROL] += 1
+            elif page is not None and FRAME0 <= page < FRAME0 + NUM_FRAMES:
+                record[instrument.FRAME] += 1
+            elif page is not None and PWM0 <= page < PWM0 + MAX_PWM_SETS:
+                record[instrument.PWM] += 1
+
+        write_register_byte = self._write_register_byte
+        write_value_at_id = self._write_value_at_id
+        write_block = self._write_block
+
+        def counted_register_byte(register, value):
+            if register == REGREG:
+                selected[0] = None
+                count(1)
+                selected[0] = value
+            else:
+                count(1)
+            write_register_byte(register, value)
+
+        def counted_value_at_id(id, value):
+            count(1)
+            write_value_at_id(id, value)
+
+        def counted_block(start_id, buf, start = 0, end = None):
+            count((len(buf) if end is None else end) - start)
+            write_block(start_id, buf, start, end)
+
+        stats.replace(self, '_write_register_byte', counted_register_byte)
+        stats.replace(self, '_write_value_at_id', counted_value_at_id)
+        # The fallback block write is made of value writes, counted already
+        if type(self)._write_block is not AS1130._write_block:
+            stats.replace(self, '_write_block', counted_block)
+
     def control_write(self, control_register, value):
+        self._control_write(control_register, value)
+        self._flush()
+
+    def _control_write(self, control_register, value):
+        # As control_write, without the flush: calls that make several
+        # control writes flush once they are all done
 
         # Select the control register
         self._write_register_byte(REGREG, CONTROL)
@@ -78,15 +385,64 @@ class AS1130:
         self._write_register_byte(control_register, value)
 
     def play_movie(self, play):
+        self._write_movie(play)
+        self._flush()
+
+    def _write_movie(self, play):
+        self._movie_playing = play
         if play:
-            self.control_write(PICTURE, 0b00000000)   # Display frame 1
-            self.control_write(MOVIE, 0b01000000)      # Turn movies on
-            self.control_write(DSP_OPTION, 0b11101011)
+            self._control_write(PICTURE, 0b00000000)   # Display frame 1
+            self._control_write(MOVIE, 0b01000000 | self._first_frame)      # Turn movies on
+            self._control_write(DSP_OPTION, 0b11101011)
 
         else:
-            self.control_write(MOVIE, 0b00000000)      # Turn movies off
-            self.control_write(PICTURE, 0b01000000)   # Display frame 1
-            self.control_write(DSP_OPTION, 0b00001011)
+            self._control_write(MOVIE, 0b00000000)      # Turn movies off
+            self._control_write(PICTURE, 0b01000000 | self._first_frame)   # Display frame 1
+            self._control_write(DSP_OPTION, 0b00001011)
+
+    def show_cached(self, key):
+        # Show a title still resident in hardware frames. Returns False
+        # if it has to be uploaded with draw_framebuffer(..., key=key).
+        if not self.stage_cached(key):
+            return False
+        self.swap()
+        return True
+
+    def stage_cached(self, key):
+        # As show_cached, but only shown on the next swap()
+        frames = self.frame_cache.lookup(key)
+        if frames is None:
+            return False
+        self._stage(frames[0], frames[1], key)
+        return True
+
+    def swap(self):
+        # Show the frames staged by the last stage_*() call, in one or
+        # two control writes. Returns False if nothing was staged.
+        if not self._staged:
+            return False
+        self._staged = False
+        self._show_frames(self._staged_first, self._staged_frames)
+        self._flush()
+        self._shown = self._staged_key
+        return True
+
+    def _stage(self, first, frames, key):
+        self._staged = True
+        self._staged_first = first
+        self._staged_frames = frames
+        self._staged_key = key
+
+    def _show_frames(self, first, frames):
+        # Point the movie, or the picture if no movie plays, at a range
+        # of frames
+        self._control_write(MOVIEMODE, frames - 1)
+        if first != self._first_frame:
+            self._first_frame = first
+            if self._movie_playing:
+                self._control_write(MOVIE, 0b01000000 | first)
+            else:
+                self._control_write(PICTURE, 0b01000000 | first)
 
     def set_movie_frames(self, frames):
         frames = frames - 1
@@ -105,14 +461,54 @@ class AS1130:
         self._write_register_byte(REGREG, pwm + PWM0)
 
     def set_ram_config(self, ram_config):
-
-        self.control_write(AS_CONFIG, ram_config)
+        # Configuration 1 has 36 frames and one blink/PWM set, every
+        # step up trades six frames for six more sets. The chip only takes
+        # a configuration while it initializes, so it is shut down,
+        # configured and started again with the other control registers
+        # as they were set, showing frame 0. Frame and PWM RAM have to be
+        # uploaded again.
+        self.num_frames = NUM_FRAMES - 6 * (ram_config - 1)
+        self.num_pwm_sets = max(1, 6 * (ram_config - 1))
+        self.frame_cache.num_frames = self.num_frames
+        self.frame_cache.clear()
+        self._shown = None
+        self._staged = False
+        for pwm_set in range(MAX_PWM_SETS):
+            self._pwm_owners[pwm_set] = None
+        self.invalidate()
+
+        self._control_write(SHUTDOWN, 0b00000000)  # Shut down to initialize
+        self._control_write(AS_CONFIG, ram_config)
+        self._control_write(CURRENT, self._current)
+        self._control_write(CLK_SYNC, self._clock_sync)
+        self._control_write(MOVIEMODE, 0b00000000)
+        self._first_frame = 0
+        self._write_movie(self._movie_playing)
+        self._write_frametime()
+        self._control_write(SHUTDOWN, 0b00000011)  # Turn on the display
+        self._flush()
 
     def set_scrolling(self, enable):
-        if enable:
-            self.control_write(FRAMETIME, 0b01110001)
+        self._scrolling = enable
+        self._write_frametime()
+        self._flush()
+
+    def _write_frametime(self):
+        if self._scrolling:
+            self._control_write(FRAMETIME, 0b01110000 | self._frame_delay)
         else:
-            self.control_write(FRAMETIME, 0b00000001)
+            self._control_write(FRAMETIME, 0b00000000 | self._frame_delay)
+
+    def set_frame_delay(self, delay):
+        # Time each movie frame is shown for, in steps of 32.5ms (1-15)
+        self._frame_delay = delay & 0x0F
+        self.set_scrolling(self._scrolling)
+
+    def set_clock_sync(self, sync):
+        # SYNC_OUT on one chip and SYNC_IN on the others runs them all
+        # from the same clock, so their movies keep in step
+        self._clock_sync = sync
+        self.control_write(CLK_SYNC, sync)
 
     def set_current(self, milliAmps):
 
@@ -123,8 +519,21 @@ class AS1130:
             milliAmps = 0
 
         register_value = int(milliAmps * MILLIAMPS_FACTOR)
+        self._current = register_value
         self.control_write(CURRENT, register_value)
 
+    def set_brightness(self, level, gamma = GAMMA):
+        # Dim everything uploaded from now on to level (0-255), with
+        # brightness values gamma corrected. Only the lookup table is
+        # rebuilt; frames at full brightness, which share PWM set 0,
+        # change at once. set_current() dims the whole chip without
+        # touching the PWM values.
+        full = self._pwm_table[255]
+        brightness_table(level, gamma, self._pwm_table)
+        if self._pwm_uniform[0] == full and self._pwm_table[255] != full:
+            self._load_uniform_pwm(0, self._pwm_table[255], self._pwm_uniform_leds[0])
+            self._flush()
+
     def _write_register_byte(self, register, value):
         # Write a single byte to the specified register
         # Some commands will require to of these, one to
@@ -137,72 +546,309 @@ class AS1130:
         # LED on/off position or PWM position)
         raise NotImplementedError
 
-    def _databit(self, x, y):
-        return(1<<(7-(x&7)))
-
-    def _databyte(self, x, y):
-        return int((y*3)+(x/8)) # for a 24x5 display
-
-    def _write_buffer_to_frame(self, framenum, buffer, width, height, use_pwm = False):
-        self.select_frame(framenum)
-
-        # build a buffer to write to the display
-        displaybuffer = bytearray(0x18)
-        pwmbuffer = bytearray(132)
-        for y in range(0, height):
-            for x in range(0, width):
-                ledIndex = (x*5+y)
-                pwmbuffer[ledIndex] = buffer[x + y * width]
-                registerBitIndex = ledIndex%10
-                registerIndex = int(ledIndex/10)*2+int(registerBitIndex/8)
-                if (buffer[x + y * width] != 0x00):
-                    displaybuffer[registerIndex] |= (1<<(registerBitIndex&7))
-                else:
-                    displaybuffer[registerIndex] &= ~(1<<(registerBitIndex&7))
-
-        displaybuffer[1] |= 0 # PWM Set 0
-        for counter in range(0, 0x18):
-            self._write_value_at_id(counter, displaybuffer[counter])
-
-        self.select_pwm(0)
-        for counter in range(0, 0x18):
-            # Set up the blink bits
-                self._write_value_at_id(counter, 0x00)
-
-        for y in range(0, height):
-            for x in range(0, width):
-                ledIndex = (x*5+y)
-                counter = ledIndex + 0x18
-                # Set all PWM values
-                if use_pwm:
-                    self._write_value_at_id(counter, pwmbuffer[ledIndex])
-                else:
-                    self._write_value_at_id(counter, 0xFF)
+    def _write_block(self, start_id, buf, start = 0, end = None):
+        # Write buf[start:end] to consecutive ids from start_id. The
+        # chip auto-increments its register pointer after every data
+        # byte, so backends that can should send the whole run as one
+        # transaction. This fallback writes one byte at a time.
+        if end is None:
+            end = len(buf)
+        for offset in range(start, end):
+            self._write_value_at_id(start_id + offset - start, buf[offset])
+
+    def _flush(self):
+        # Called once a control write or an upload is complete. Backends
+        # that queue writes to send them in batches send them now.
+        pass
+
+    def invalidate(self):
+        # Forget what the frame and PWM RAM hold so the next upload of
+        # each frame is sent in full. Call after resetting the chip.
+        for frame in range(NUM_FRAMES):
+            self._frame_valid[frame] = 0
+        for pwm_set in range(MAX_PWM_SETS):
+            self._pwm_valid[pwm_set] = 0
+            self._pwm_uniform[pwm_set] = NOT_UNIFORM
+
+    def _sync_page(self, page, image, offset, length, shadow, base, valid):
+        # Bring a frame or PWM page in line with image[offset:offset + length],
+        # sending only the runs that differ from the shadow copy at
+        # shadow[base:]. Runs separated by no more than MERGE_GAP unchanged
+        # bytes are merged into one block write. Works in place, without
+        # allocating.
+        if not valid:
+            self._write_register_byte(REGREG, page)
+            self._write_block(0, image, offset, offset + length)
+            for counter in range(length):
+                shadow[base + counter] = image[offset + counter]
+            return
+
+        selected = False
+        start = 0
+        while start < length:
+            if shadow[base + start] == image[offset + start]:
+                start += 1
+                continue
+
+            # Extend the run while changes are close enough together
+            end = start + 1
+            scan = end
+            while scan < length and scan - end <= MERGE_GAP:
+                if shadow[base + scan] != image[offset + scan]:
+                    end = scan + 1
+                scan += 1
+
+            if not selected:
+                self._write_register_byte(REGREG, page)
+                selected = True
+            self._write_block(start, image, offset + start, offset + end)
+            for counter in range(start, end):
+                shadow[base + counter] = image[offset + counter]
+            start = end
+
+    def _sync_frame(self, framenum, image, offset):
+        self._sync_page(framenum + FRAME0, image, offset, FRAME_BYTES,
+                        self._frame_shadow, framenum * FRAME_BYTES, self._frame_valid[framenum])
+        self._frame_valid[framenum] = 1
+
+    def _sync_pwm_set(self, pwm_set, leds):
+        # Bring a blink/PWM set in line with the PWM scratch image
+        pwm_shadow = self._pwm_shadow.get(pwm_set)
+        if pwm_shadow is None:
+            pwm_shadow = bytearray(PWM_PAGE_BYTES)
+            self._pwm_shadow[pwm_set] = pwm_shadow
+        self._sync_page(pwm_set + PWM0, self._pwm_image, 0, FRAME_BYTES + leds,
+                        pwm_shadow, 0, self._pwm_valid[pwm_set])
+        self._pwm_valid[pwm_set] = 1
+
+    def _load_uniform_pwm(self, pwm_set, level, leds):
+        # Give the first leds LEDs of a blink/PWM set the PWM value level,
+        # unless they have it already
+        if self._pwm_uniform[pwm_set] == level and self._pwm_uniform_leds[pwm_set] >= leds:
+            return
+        pwmbuffer = self._pwm_image
+        for counter in range(0, FRAME_BYTES):
+            pwmbuffer[counter] = 0x00
+        for counter in range(FRAME_BYTES, FRAME_BYTES + leds):
+            pwmbuffer[counter] = level
+        self._sync_pwm_set(pwm_set, leds)
+        self._pwm_uniform[pwm_set] = level
+        self._pwm_uniform_leds[pwm_set] = leds
+
+    def _pick_pwm_set(self, uniform, leds):
+        # Blink/PWM set for the window of a PWM upload just encoded.
+        # Windows of one brightness share a set holding it: one this
+        # upload has taken, or set 0 at full brightness. Any other window
+        # takes a set of its own, see _take_pwm_set().
+        if uniform is None:
+            # Nothing lit, any PWM values will do
+            return 0
+        if uniform != NOT_UNIFORM:
+            if self._pwm_owners[0] is None and self._holds_uniform(0, uniform, leds):
+                return 0
+            for index in range(self._upload_set_count):
+                pwm_set = self._upload_sets[index]
+                if self._holds_uniform(pwm_set, uniform, leds):
+                    return pwm_set
+        return self._take_pwm_set()
+
+    def _holds_uniform(self, pwm_set, level, leds):
+        return self._pwm_uniform[pwm_set] == level and self._pwm_uniform_leds[pwm_set] >= leds
+
+    def _take_pwm_set(self):
+        # A set for the PWM upload in progress. First choice is a set no
+        # frames on display use. Then comes one they do use, which they
+        # show wrongly until the swap. Last is set 0 while it holds full
+        # brightness: every cached title but this one uses or may use it,
+        # so they are all dropped. Raises ValueError with every set taken.
+        owners = self._pwm_owners
+        shown = self._shown
+        free = None
+        displayed = None
+        for pwm_set in range(min(self.num_pwm_sets, MAX_PWM_SETS)):
+            if self._taken_pwm_set(pwm_set):
+                continue
+            owner = owners[pwm_set]
+            if pwm_set == 0 and owner is None:
+                continue
+            if owner is None or owner != shown:
+                free = pwm_set
+                break
+            if displayed is None:
+                displayed = pwm_set
+        if free is None:
+            free = displayed
+        if free is None:
+            if self._taken_pwm_set(0):
+                self.frame_cache.discard(self._upload_key)
+                raise ValueError("Not enough PWM sets for these frames")
+            free = 0
+            self.frame_cache.discard_all_but(self._upload_key)
+        self._claim_pwm_set(free, self._upload_key)
+        self._upload_sets[self._upload_set_count] = free
+        self._upload_set_count += 1
+        return free
+
+    def _taken_pwm_set(self, pwm_set):
+        # Whether the PWM upload in progress has taken pwm_set
+        for index in range(self._upload_set_count):
+            if self._upload_sets[index] == pwm_set:
+                return True
+        return False
+
+    def _claim_pwm_set(self, pwm_set, key):
+        # Hand a PWM set to the upload for key, None for the on/off frames.
+        # A cached title whose frames used it would show the wrong
+        # brightness, so it is dropped from the frame cache, even the one
+        # on display. Uploads without a key are never shown from the cache,
+        # so theirs stay, which keeps them from allocating. On/off frames
+        # always take set 0, packed ones have it in their images, even if
+        # a PWM movie on display uses it.
+        owner = self._pwm_owners[pwm_set]
+        if owner is not None and owner != key and \
+           owner is not self._buffer_keys[0] and owner is not self._buffer_keys[1]:
+            self.frame_cache.discard(owner)
+        self._pwm_owners[pwm_set] = key
+
+    def _write_buffer_to_frame(self, framenum, buffer, width, height, use_pwm = False,
+                               offset = 0, stride = None):
+        # Upload a width x height window of buffer, starting at offset
+        # with rows stride bytes apart, to a frame. Encodes into the
+        # driver's scratch images, so nothing is allocated per frame. PWM
+        # frames get their set once encoded, see _pick_pwm_set().
+        if stride is None:
+            stride = width
+        displaybuffer = self._onoff_image
+        if use_pwm:
+            pwmbuffer = self._pwm_image # blink bits are left clear
+            uniform = encode_frame(buffer, offset, stride, width, height, displaybuffer,
+                                   pwmbuffer, self._pwm_table)
+            pwm_set = self._pick_pwm_set(uniform, width * height)
+        else:
+            encode_frame(buffer, offset, stride, width, height, displaybuffer)
+            uniform = self._pwm_table[255]
+            pwm_set = 0
+            self._claim_pwm_set(0, None)
+
+        displaybuffer[1] |= pwm_set << 5 # PWM Set
+
+        self._sync_frame(framenum, displaybuffer, 0)
+        leds = width * height
+        if uniform is None:
+            # Nothing lit, any PWM values will do
+            pass
+        elif uniform == NOT_UNIFORM:
+            self._sync_pwm_set(pwm_set, leds)
+            self._pwm_uniform[pwm_set] = NOT_UNIFORM
+        else:
+            self._load_uniform_pwm(pwm_set, uniform, leds)
+
+    def _write_packed_frame(self, framenum, image, offset, width, height):
+        # Upload a frame already packed in the on/off register layout,
+        # such as a frame of a display.MonoFrameBuffer, at full brightness
+        # with PWM set 0. No encoding pass, just a block copy.
+        self._sync_frame(framenum, image, offset)
+        self._claim_pwm_set(0, None)
+        self._load_uniform_pwm(0, self._pwm_table[255], width * height)
 
     # Draw a large framebuffer to the screen, breaking it up in to frames that
-    # fit
-    def draw_framebuffer(self, framebuffer, clip_to_x = 0, use_pwm = False):
+    # fit. Only the frames up to clip_to_x (the whole width if 0) are sent,
+    # and the movie is set to their length. With a key the frames are kept
+    # in the frame cache so the title can be shown again with
+    # show_cached(key). PWM frames get a PWM set each, except that frames
+    # of one brightness share one, see _pick_pwm_set(); without enough
+    # sets ValueError is raised. Packed
+    # framebuffers (display.MonoFrameBuffer) are copied as they are.
+    # The frames on display are never written to, the new ones are
+    # switched to once complete.
+    def draw_framebuffer(self, framebuffer, clip_to_x = 0, use_pwm = False, key = None):
+        self.stage_framebuffer(framebuffer, clip_to_x, use_pwm, key)
+        self.swap()
+
+    # As draw_framebuffer, but the frames are only shown on the next
+    # swap(), so an upload can happen while the current title plays.
+    # With rotate the movie starts that many frames in, wrapping around,
+    # which is how chips side by side show one scrolling title.
+    def stage_framebuffer(self, framebuffer, clip_to_x = 0, use_pwm = False, key = None,
+                          rotate = 0):
         width = framebuffer.width
         height = framebuffer.height
-        clip_by = framebuffer.width - clip_to_x
 
         numberofframes = int(width / 24)
-        numberofHWframes = int((width - clip_by) / 24) + 1
-
-        if numberofHWframes > numberofframes:
-            numberofHWframes = numberofframes
 
-      #  self.set_movie_frames(numberofHWframes)
-        self.set_movie_frames(numberofframes)
-
-        for frame in range(0, numberofframes):
-
-            # copy subframe
-            subframe = bytearray(24*5)
-            for x in range(0, 24):
-                for y in range(0, 5):
-                    subframe[x + y * 24] = framebuffer._framebuffer[x + (24 * frame) + width * y]
-            self._write_buffer_to_frame(frame, subframe, int(width / numberofframes), height, use_pwm)
+        if framebuffer.packed:
+            if framebuffer.frame_width != 24:
+                raise ValueError("Packed framebuffer frames must be 24 columns")
+            self.stage_frame_images(framebuffer._framebuffer, numberofframes, height, key,
+                                    clip_to_x, rotate)
+            return
+
+        numberofHWframes, blank_frames = self._content_frames(numberofframes, clip_to_x)
+        total = numberofHWframes + blank_frames
+        first = self._begin_upload(total, key)
+        for frame in range(0, total):
+            window = (frame + rotate) % total
+            if window >= numberofHWframes:
+                self._write_blank_frame(first + frame)
+                continue
+            # Encode each 24 column window straight out of the framebuffer
+            self._write_buffer_to_frame(first + frame, framebuffer._framebuffer, 24, height,
+                                        use_pwm, 24 * window, width)
+        self._end_upload(first, total)
+
+    # Upload frames already packed in the on/off register layout, such as
+    # a title read from a show reel, at full brightness. images holds
+    # FRAME_BYTES per frame; clip_to_x is as for draw_framebuffer.
+    def draw_frame_images(self, images, numberofframes, height = 5, key = None, clip_to_x = 0):
+        self.stage_frame_images(images, numberofframes, height, key, clip_to_x)
+        self.swap()
+
+    def stage_frame_images(self, images, numberofframes, height = 5, key = None, clip_to_x = 0,
+                           rotate = 0):
+        numberofHWframes, blank_frames = self._content_frames(numberofframes, clip_to_x)
+        total = numberofHWframes + blank_frames
+        first = self._begin_upload(total, key)
+        for frame in range(0, total):
+            window = (frame + rotate) % total
+            if window >= numberofHWframes:
+                self._write_blank_frame(first + frame)
+            else:
+                self._write_packed_frame(first + frame, images, window * FRAME_BYTES, 24, height)
+        self._end_upload(first, total)
+
+    def _content_frames(self, numberofframes, clip_to_x):
+        # Frames holding columns up to clip_to_x, and how many blank frames
+        # to scroll in after them: one, if scrolling a title shorter than
+        # the framebuffer, so its end does not run into its start
+        if clip_to_x <= 0:
+            return numberofframes, 0
+        numberofHWframes = min(numberofframes, (clip_to_x + 23) // 24)
+        if self._scrolling and numberofHWframes < numberofframes:
+            return numberofHWframes, 1
+        return numberofHWframes, 0
+
+    def _write_blank_frame(self, framenum):
+        # All the blank frames share one all-off image; a frame that is
+        # blank already costs nothing
+        self._sync_frame(framenum, self._blank_image, 0)
+
+    def _begin_upload(self, numberofframes, key):
+        # Pick the frames an upload goes to, never the ones on display
+        if key is None:
+            self._buffer_key ^= 1
+            key = self._buffer_keys[self._buffer_key]
+        self._upload_key = key
+        self._upload_set_count = 0
+        self._staged = False
+        try:
+            return self.frame_cache.allocate(key, numberofframes, self._shown)
+        except ValueError:
+            # No room beside the frames on display
+            return self.frame_cache.allocate(key, numberofframes)
+
+    def _end_upload(self, first, numberofframes):
+        self._flush()
+        self._stage(first, numberofframes, self._upload_key)
 
 class AS1130_I2C(AS1130):
 
@@ -212,6 +858,8 @@ class AS1130_I2C(AS1130):
         import adafruit_bus_device.i2c_device as i2c_device
         self._i2c = i2c_device.I2CDevice(i2c, address)
         self._buffer = bytearray(2)
+        # Start id plus the largest page (blink bits and PWM values)
+        self._block = bytearray(1 + 0x18 + 132)
         super().__init__()
 
     def _write_register_byte(self, register, value):
@@ -227,4 +875,16 @@ class AS1130_I2C(AS1130):
         with self._i2c as i2c:
             i2c.write(self._buffer, start = 0, end = 2)
 
+    def _write_block(self, start_id, buf, start = 0, end = None):
+        # One transaction: the start id followed by the data, the
+        # chip auto-increments the register pointer
+        if end is None:
+            end = len(buf)
+        length = end - start
+        block = self._block
+        block[0] = start_id & 0xFF
+        block[1:length + 1] = memoryview(buf)[start:end]
+        with self._i2c as i2c:
+            i2c.write(block, start = 0, end = length + 1)
+
 ################################### END OF AS1130 DRIVER ############################
\ No newline at end of file
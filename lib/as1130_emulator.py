@@ -0,0 +1,111 @@
+from as1130 import (AS1130, REGREG, CONTROL, FRAME0, PWM0, PICTURE, MOVIE,
+                    MOVIEMODE, AS_CONFIG, SHUTDOWN, NUM_FRAMES, FRAME_BYTES,
+                    PWM_PAGE_BYTES, led_tables)
+
+# Register pages the emulator models
+MAX_PWM_SETS = 30           # In RAM configuration 6
+CONTROL_BYTES = 0x40        # Control registers up to the open LED block
+
+class AS1130_Emulator(AS1130):
+
+    """In-memory AS1130 model for testing and benchmarking off hardware."""
+
+    def __init__(self, *, clock_hz=400000):
+        # Models the REGREG page selection, frame RAM, blink/PWM sets and
+        # control registers, and counts the transactions, bytes and bus
+        # time an I2C bus at clock_hz would have needed. Like the chip it
+        # only takes a RAM configuration while shut down, and refuses
+        # frames and PWM sets the configuration does not have.
+        self.clock_hz = clock_hz
+        self.page = 0
+        self.ram_config = 1
+        self.frames = bytearray(NUM_FRAMES * FRAME_BYTES)
+        self.pwm_sets = [bytearray(PWM_PAGE_BYTES) for _ in range(MAX_PWM_SETS)]
+        self.control = bytearray(CONTROL_BYTES)
+        self.reset_counters()
+        super().__init__()
+
+    def reset_counters(self):
+        self.transactions = 0
+        self.bytes_sent = 0
+        self.bus_time = 0.0
+
+    def _write_register_byte(self, register, value):
+        self._count(1)
+        if register == REGREG:
+            self.page = value & 0xFF
+        else:
+            self._store(register, value & 0xFF)
+
+    def _write_value_at_id(self, id, value):
+        self._count(1)
+        self._store(id, value & 0xFF)
+
+    def _write_block(self, start_id, buf, start = 0, end = None):
+        if end is None:
+            end = len(buf)
+        self._count(end - start)
+        for offset in range(start, end):
+            self._store(start_id + offset - start, buf[offset])
+
+    def _count(self, length):
+        # Bus cost: start, address byte, register id and data bytes each
+        # with an ack bit, then stop
+        self.transactions += 1
+        self.bytes_sent += length + 1
+        self.bus_time += ((length + 2) * 9 + 2) / self.clock_hz
+
+    def _store(self, id, value):
+        # Write a byte to the RAM behind the selected page
+        page = self.page
+        if page == CONTROL:
+            memory, base, size = self.control, 0, CONTROL_BYTES
+            if id == AS_CONFIG and not self.control[SHUTDOWN] & 0x01:
+                self.ram_config = value & 0x07
+        elif FRAME0 <= page < FRAME0 + NUM_FRAMES:
+            if page - FRAME0 >= NUM_FRAMES - 6 * (self.ram_config - 1):
+                raise ValueError("Frame 0x%02x not in RAM configuration %d" % (page, self.ram_config))
+            memory, base, size = self.frames, (page - FRAME0) * FRAME_BYTES, FRAME_BYTES
+        elif PWM0 <= page < PWM0 + MAX_PWM_SETS:
+            if page - PWM0 >= max(1, 6 * (self.ram_config - 1)):
+                raise ValueError("PWM set 0x%02x not in RAM configuration %d" % (page, self.ram_config))
+            memory, base, size = self.pwm_sets[page - PWM0], 0, PWM_PAGE_BYTES
+        else:
+            raise ValueError("Unknown register page 0x%02x" % page)
+        if id >= size:
+            raise ValueError("Write past the end of page 0x%02x" % page)
+        memory[base + id] = value
+
+    def displayed_frame(self):
+        # Frame shown right now: the first movie frame while a movie
+        # plays, else the picture frame. None when nothing is shown.
+        if not self.control[SHUTDOWN] & 0x01:
+            return None
+        if self.control[MOVIE] & 0x40:
+            return self.control[MOVIE] & 0x3F
+        if self.control[PICTURE] & 0x40:
+            return self.control[PICTURE] & 0x3F
+        return None
+
+    def movie_frames(self):
+        # The frame range the movie loops through
+        first = self.control[MOVIE] & 0x3F
+        return range(first, first + (self.control[MOVIEMODE] & 0x3F) + 1)
+
+    def decode_frame(self, frame, width=24, height=5):
+        # Brightness of every pixel of a frame as the chip would show it,
+        # laid out like a display.FrameBuffer
+        registers, masks, pwm_ids = led_tables(width, height)
+        onoff = memoryview(self.frames)[frame * FRAME_BYTES:(frame + 1) * FRAME_BYTES]
+        pwm = self.pwm_sets[onoff[1] >> 5]
+        pixels = bytearray(width * height)
+        for index in range(width * height):
+            if onoff[registers[index]] & masks[index]:
+                pixels[index] = pwm[pwm_ids[index]]
+        return pixels
+
+    def displayed_pixels(self, width=24, height=5):
+        frame = self.displayed_frame()
+        if frame is None:
+            return bytearray(width * height)
+        return self.decode_frame(frame, width, height)
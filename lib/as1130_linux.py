@@ -0,0 +1,95 @@
+import ctypes
+import fcntl
+import os
+
+from as1130 import AS1130, PWM_PAGE_BYTES
+
+# From linux/i2c-dev.h
+I2C_RDWR = 0x0707
+I2C_RDWR_IOCTL_MAX_MSGS = 42
+MESSAGE_BYTES = 1 + PWM_PAGE_BYTES  # Register id plus the largest page
+
+class i2c_msg(ctypes.Structure):
+    _fields_ = [('addr', ctypes.c_uint16),
+                ('flags', ctypes.c_uint16),
+                ('len', ctypes.c_uint16),
+                ('buf', ctypes.POINTER(ctypes.c_uint8))]
+
+class i2c_rdwr_ioctl_data(ctypes.Structure):
+    _fields_ = [('msgs', ctypes.POINTER(i2c_msg)),
+                ('nmsgs', ctypes.c_uint32)]
+
+def _open_device(path):
+    return os.open(path, os.O_RDWR)
+
+class AS1130_Linux(AS1130):
+
+    """Driver for the AS1130 LED Matrix Controller on a Linux i2c-dev bus."""
+
+    def __init__(self, bus = 1, *, address = 0x30, ioctl = None, opener = None, closer = None):
+        # Writes are queued as I2C messages and sent together in one
+        # I2C_RDWR ioctl when a control write or an upload completes, or
+        # when the queue is full. ioctl(fd, request, arg), opener(path)
+        # and closer(fd) default to fcntl.ioctl, os.open and os.close and
+        # can be replaced to run without the hardware.
+        self._ioctl = ioctl if ioctl is not None else fcntl.ioctl
+        self._closer = closer if closer is not None else os.close
+        self._fd = (opener if opener is not None else _open_device)('/dev/i2c-%d' % bus)
+        self.address = address
+
+        # Every message gets a fixed slot of the data buffer
+        self._data = (ctypes.c_uint8 * (I2C_RDWR_IOCTL_MAX_MSGS * MESSAGE_BYTES))()
+        self._messages = (i2c_msg * I2C_RDWR_IOCTL_MAX_MSGS)()
+        base = ctypes.addressof(self._data)
+        for index in range(I2C_RDWR_IOCTL_MAX_MSGS):
+            message = self._messages[index]
+            message.addr = address
+            message.flags = 0
+            message.buf = ctypes.cast(base + index * MESSAGE_BYTES, ctypes.POINTER(ctypes.c_uint8))
+        self._rdwr = i2c_rdwr_ioctl_data(self._messages, 0)
+        self._pending = 0
+        super().__init__()
+
+    def close(self):
+        self._flush()
+        self._closer(self._fd)
+
+    def _write_register_byte(self, register, value):
+        slot = self._next_message(2)
+        self._data[slot] = register & 0xFF
+        self._data[slot + 1] = value & 0xFF
+
+    def _write_value_at_id(self, id, value):
+        slot = self._next_message(2)
+        self._data[slot] = id & 0xFF
+        self._data[slot + 1] = value & 0xFF
+
+    def _write_block(self, start_id, buf, start = 0, end = None):
+        # One message: the start id followed by the data, the chip
+        # auto-increments the register pointer
+        if end is None:
+            end = len(buf)
+        slot = self._next_message(end - start + 1)
+        data = self._data
+        data[slot] = start_id & 0xFF
+        for counter in range(start, end):
+            data[slot + 1 + counter - start] = buf[counter]
+
+    def _next_message(self, length):
+        # Queue a message of length bytes, sending the queue first if it
+        # is full. Returns where its data goes in self._data.
+        if self._pending == I2C_RDWR_IOCTL_MAX_MSGS:
+            self._flush()
+        index = self._pending
+        self._messages[index].len = length
+        self._pending = index + 1
+        return index * MESSAGE_BYTES
+
+    def _flush(self):
+        # Send every queued message in one I2C_RDWR ioctl, each with a
+        # repeated start, the last one ending with a stop
+        if not self._pending:
+            return
+        self._rdwr.nmsgs = self._pending
+        self._pending = 0
+        self._ioctl(self._fd, I2C_RDWR, self._rdwr)
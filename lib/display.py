@@ -1,18 +1,25 @@
 class FrameBuffer:
 
     """Frame buffer for LED Matrix"""
+    packed = False  # Pixels are brightness bytes, row by row
+
     def __init__(self, width, height):
         # Single frame buffer, encoding brightness as
         # pixel value. Values of 0 are turned off
         self.width = width
         self.height = height
         self._framebuffer = bytearray(width * height)
+        # A row of the last fill value, and a row to shift through, so
+        # the bulk operations can work in slices without allocating
+        self._fill_row = bytearray(width)
+        self._fill_value = 0
+        self._scratch_row = bytearray(width)
 
     def blit(self, x, y, buffer, width, height):
         start_pos = y * self.width + x
 
-        # Need to skip at byte boundaries
-        storage_width = int((width + 8) / 8) * 8
+        # Each row starts on a byte boundary
+        storage_width = ((width + 7) // 8) * 8
         for y1 in range(0, height):
             for x1 in range(0, width):
                 source_byte_pos = int((x1 + y1 * storage_width) / 8)
@@ -22,36 +29,441 @@ class FrameBuffer:
                 else:
                     self._framebuffer[start_pos + x1 + (y+y1) * self.width] = 0x00
 
+    def blit_rows(self, x, y, rows, width, height, stride = None):
+        # Copy in a width x height brightness image, such as a glyph from
+        # font.glyph_rows, one row slice at a time, clipped to the buffer.
+        # Rows are stride bytes apart in rows, width by default.
+        if stride is None:
+            stride = width
+        x1, y1, copy_width, copy_height = self._clip(x, y, width, height)
+        # Skip the rows and columns clipped off the top and left
+        source = (y1 - y) * stride + (x1 - x)
+        for row in range(0, copy_height):
+            start_pos = x1 + (y1 + row) * self.width
+            source_pos = source + row * stride
+            self._framebuffer[start_pos:start_pos + copy_width] = rows[source_pos:source_pos + copy_width]
+
     def set_pixel_value(self, x, y, val):
         self._framebuffer[x + y * self.width] = val
 
+    def get_pixel_value(self, x, y):
+        return self._framebuffer[x + y * self.width]
+
     def clear_buffer(self):
-        for x in range(self.width):
-            for y in range(self.height):
-                self.set_pixel_value(x, y, 0)
+        self.fill(0)
+
+    def _fill_source(self, val, width):
+        # width bytes of val to copy from
+        if val != self._fill_value:
+            for x in range(self.width):
+                self._fill_row[x] = val
+            self._fill_value = val
+        return memoryview(self._fill_row)[0:width]
+
+    def _clip(self, x, y, width, height):
+        # Clip a rectangle to the buffer. Width or height come back zero
+        # when nothing is left.
+        if x < 0:
+            width += x
+            x = 0
+        if y < 0:
+            height += y
+            y = 0
+        width = max(0, min(width, self.width - x))
+        height = max(0, min(height, self.height - y))
+        return x, y, width, height
+
+    def fill(self, val):
+        self.fill_rect(0, 0, self.width, self.height, val)
+
+    def fill_rect(self, x, y, width, height, val):
+        x, y, width, height = self._clip(x, y, width, height)
+        if width == 0 or height == 0:
+            return
+        source = self._fill_source(val, width)
+        for y1 in range(y, y + height):
+            start_pos = x + y1 * self.width
+            self._framebuffer[start_pos:start_pos + width] = source
+
+    def copy_region(self, src_x, src_y, width, height, x, y):
+        # Copy a rectangle of this buffer to (x, y). Overlapping copies
+        # are fine.
+        self._copy_rows(self, src_x, src_y, width, height, x, y)
+
+    def blit_buffer(self, source, x, y, src_x = 0, src_y = 0, width = None, height = None):
+        # Copy a rectangle of another FrameBuffer, all of it by default,
+        # to (x, y)
+        if width is None:
+            width = source.width - src_x
+        if height is None:
+            height = source.height - src_y
+        self._copy_rows(source, src_x, src_y, width, height, x, y)
+
+    def _copy_rows(self, source, src_x, src_y, width, height, x, y):
+        # Clip against both buffers, then copy a row slice at a time
+        src_x1, src_y1, width, height = source._clip(src_x, src_y, width, height)
+        x += src_x1 - src_x
+        y += src_y1 - src_y
+        x1, y1, width, height = self._clip(x, y, width, height)
+        src_x1 += x1 - x
+        src_y1 += y1 - y
+        if width == 0 or height == 0:
+            return
+
+        # Work from the far end when moving down within the same buffer
+        rows = range(0, height)
+        if source is self and y1 > src_y1:
+            rows = range(height - 1, -1, -1)
+        if source.packed:
+            # No brightness bytes to slice, read it a pixel at a time
+            for row in rows:
+                start_pos = x1 + (y1 + row) * self.width
+                for column in range(0, width):
+                    self._framebuffer[start_pos + column] = source.get_pixel_value(src_x1 + column, src_y1 + row)
+            return
+        scratch = memoryview(self._scratch_row)[0:width]
+        source_view = memoryview(source._framebuffer)
+        for row in rows:
+            src_pos = src_x1 + (src_y1 + row) * source.width
+            start_pos = x1 + (y1 + row) * self.width
+            scratch[:] = source_view[src_pos:src_pos + width]
+            self._framebuffer[start_pos:start_pos + width] = scratch
+
+    def shift_horizontal(self, pixels, wrap = True, val = 0):
+        # Move everything right by pixels, or left if negative. Pixels
+        # pushed off one side come back on the other when wrapping, else
+        # the gap is filled with val.
+        width = self.width
+        if wrap:
+            pixels %= width
+        elif pixels >= width or -pixels >= width:
+            self.fill(val)
+            return
+        if pixels == 0:
+            return
+
+        scratch = self._scratch_row
+        view = memoryview(self._framebuffer)
+        moved = width - abs(pixels)
+        for y in range(0, self.height):
+            start_pos = y * width
+            scratch[:] = view[start_pos:start_pos + width]
+            if pixels > 0:
+                self._framebuffer[start_pos + pixels:start_pos + width] = memoryview(scratch)[0:moved]
+                if wrap:
+                    self._framebuffer[start_pos:start_pos + pixels] = memoryview(scratch)[moved:width]
+                else:
+                    self._framebuffer[start_pos:start_pos + pixels] = self._fill_source(val, pixels)
+            else:
+                self._framebuffer[start_pos:start_pos + moved] = memoryview(scratch)[-pixels:width]
+                self._framebuffer[start_pos + moved:start_pos + width] = self._fill_source(val, -pixels)
+
+    def shift_vertical(self, rows, wrap = True, val = 0):
+        # Move everything down by rows, or up if negative, wrapping or
+        # filling with val like shift_horizontal
+        height = self.height
+        if wrap:
+            rows %= height
+            if rows > height // 2:
+                rows -= height
+        elif rows >= height or -rows >= height:
+            self.fill(val)
+            return
+
+        # One row at a time through the scratch row
+        width = self.width
+        scratch = self._scratch_row
+        view = memoryview(self._framebuffer)
+        step = 1 if rows > 0 else -1
+        for _ in range(0, abs(rows)):
+            if step > 0:
+                scratch[:] = view[(height - 1) * width:height * width]
+                for y in range(height - 1, 0, -1):
+                    self._framebuffer[y * width:(y + 1) * width] = view[(y - 1) * width:y * width]
+                edge = 0
+            else:
+                scratch[:] = view[0:width]
+                for y in range(0, height - 1):
+                    self._framebuffer[y * width:(y + 1) * width] = view[(y + 1) * width:(y + 2) * width]
+                edge = (height - 1) * width
+            if wrap:
+                self._framebuffer[edge:edge + width] = scratch
+            else:
+                self._framebuffer[edge:edge + width] = self._fill_source(val, width)
 
     def draw_string(self, x, y, msg, font, fill = False):
-        max_str_length = int(self.width / (font.width + 1))
-        if len(msg) > max_str_length:
-            msg = msg[:(max_str_length-2)] + '..'
-        else:
-            msg = msg[:max_str_length] + '.' * (max_str_length - len(msg))
+        # Lay msg out glyph by glyph, each taking its own advance width
+        # plus a blank column, cut short with '..' if it does not fit.
+        # With fill the rest of the buffer is padded with '.'. Returns
+        # the x just past the last column of msg.
+        if x + font.text_width(msg) > self.width:
+            dots_width = font.text_width('..')
+            length = 0
+            right = x
+            for c in msg:
+                advance = font.advance(c) + 1
+                if right + advance + dots_width > self.width:
+                    break
+                right += advance
+                length += 1
+            msg = msg[:length] + '..'
         for c in msg:
-            self.blit(x, y, font.glyph(c), font.width, font.height)
-            x = x + font.width + 1
+            advance = font.advance(c)
+            self.blit_rows(x, y, font.glyph_rows(c), advance, font.height, font.width)
+            x = x + advance + 1
+        end = x - 1 if msg else x
 
-        return x - font.width
+        if fill:
+            rows = font.glyph_rows('.')
+            advance = font.advance('.')
+            while x + advance <= self.width:
+                self.blit_rows(x, y, rows, advance, font.height, font.width)
+                x = x + advance + 1
+        return end
 
-class font:
-    """Convenience class to hold monospace font data and sizeing info"""
-    def __init__(self, width, height, fontbuffer):
+    def draw_string_cached(self, x, y, msg, font, cache, fill = False, store = True):
+        # Replace the buffer contents with msg drawn as by draw_string on a
+        # cleared buffer, reusing the rendering kept in cache if there is
+        # one. Without store a new rendering is not kept, for strings that
+        # would be evicted before they are drawn again.
+        if store or len(cache):
+            key = (msg, font, self.packed, self.width, self.height, x, y, fill)
+            entry = cache.get(key)
+            if entry is not None:
+                self._framebuffer[:] = entry[1]
+                return entry[2]
+        self.clear_buffer()
+        string_length = self.draw_string(x, y, msg, font, fill)
+        if store:
+            cache.put(key, bytes(self._framebuffer), string_length)
+        return string_length
+
+class MonoFrameBuffer(FrameBuffer):
+
+    """On/off frame buffer packed like the AS1130's frame on/off registers"""
+    packed = True
+    FRAME_BYTES = 0x18      # On/off registers per AS1130 frame
+    LEDS_PER_PAIR = 10      # LEDs per register pair
+
+    def __init__(self, width, height, frame_width = 24):
+        # One frame of on/off registers per frame_width columns. LEDs are
+        # numbered down each column, ten to a register pair, so a frame
+        # uploads as a straight block copy. Lit pixels read back as 0xFF.
+        if width % frame_width or frame_width * height > (self.FRAME_BYTES // 2) * self.LEDS_PER_PAIR:
+            raise ValueError("Geometry does not fit AS1130 frames")
         self.width = width
         self.height = height
-        self.bitmaptable = fontbuffer
+        self.frame_width = frame_width
+        self._framebuffer = bytearray((width // frame_width) * self.FRAME_BYTES)
+
+        # Register and bit of every LED within a frame
+        leds = frame_width * height
+        self._led_byte = bytearray(leds)
+        self._led_mask = bytearray(leds)
+        for led in range(leds):
+            bit = led % self.LEDS_PER_PAIR
+            self._led_byte[led] = (led // self.LEDS_PER_PAIR) * 2 + (bit >> 3)
+            self._led_mask[led] = 1 << (bit & 7)
+
+    def _position(self, x, y):
+        frame = x // self.frame_width
+        led = (x - frame * self.frame_width) * self.height + y
+        return frame * self.FRAME_BYTES + self._led_byte[led], self._led_mask[led]
+
+    def set_pixel_value(self, x, y, val):
+        position, mask = self._position(x, y)
+        if val:
+            self._framebuffer[position] |= mask
+        else:
+            self._framebuffer[position] &= ~mask
+
+    def get_pixel_value(self, x, y):
+        position, mask = self._position(x, y)
+        return 0xff if self._framebuffer[position] & mask else 0x00
+
+    def fill_rect(self, x, y, width, height, val):
+        x, y, width, height = self._clip(x, y, width, height)
+        if not val and width == self.width and height == self.height:
+            for position in range(len(self._framebuffer)):
+                self._framebuffer[position] = 0
+            return
+        for y1 in range(y, y + height):
+            for x1 in range(x, x + width):
+                self.set_pixel_value(x1, y1, val)
+
+    def blit(self, x, y, buffer, width, height):
+        # Same bit packed glyph as FrameBuffer.blit, set a pixel at a time
+        storage_width = ((width + 7) // 8) * 8
+        x1, y1, copy_width, copy_height = self._clip(x, y, width, height)
+        for row in range(y1 - y, y1 - y + copy_height):
+            for column in range(x1 - x, x1 - x + copy_width):
+                bit = column + row * storage_width
+                self.set_pixel_value(x + column, y + row,
+                                     buffer[bit >> 3] & (0b10000000 >> (bit & 0x7)))
+
+    def blit_rows(self, x, y, rows, width, height, stride = None):
+        if stride is None:
+            stride = width
+        x1, y1, copy_width, copy_height = self._clip(x, y, width, height)
+        source = (y1 - y) * stride + (x1 - x)
+        for row in range(0, copy_height):
+            for column in range(0, copy_width):
+                self.set_pixel_value(x1 + column, y1 + row, rows[source + column + row * stride])
+
+    def _copy_rows(self, source, src_x, src_y, width, height, x, y):
+        src_x1, src_y1, width, height = source._clip(src_x, src_y, width, height)
+        x += src_x1 - src_x
+        y += src_y1 - src_y
+        x1, y1, width, height = self._clip(x, y, width, height)
+        src_x1 += x1 - x
+        src_y1 += y1 - y
+
+        # Work from the far end when moving within the same buffer
+        columns = range(0, width)
+        rows = range(0, height)
+        if source is self:
+            if x1 > src_x1:
+                columns = range(width - 1, -1, -1)
+            if y1 > src_y1:
+                rows = range(height - 1, -1, -1)
+        for row in rows:
+            for column in columns:
+                self.set_pixel_value(x1 + column, y1 + row,
+                                     source.get_pixel_value(src_x1 + column, src_y1 + row))
+
+    def shift_horizontal(self, pixels, wrap = True, val = 0):
+        self._shift(pixels, 0, wrap, val)
+
+    def shift_vertical(self, rows, wrap = True, val = 0):
+        self._shift(0, rows, wrap, val)
+
+    def _shift(self, pixels, rows, wrap, val):
+        # Pixel by pixel from a copy of the buffer
+        original = MonoFrameBuffer(self.width, self.height, self.frame_width)
+        original._framebuffer[:] = self._framebuffer
+        for y in range(0, self.height):
+            for x in range(0, self.width):
+                src_x = x - pixels
+                src_y = y - rows
+                if wrap:
+                    value = original.get_pixel_value(src_x % self.width, src_y % self.height)
+                elif 0 <= src_x < self.width and 0 <= src_y < self.height:
+                    value = original.get_pixel_value(src_x, src_y)
+                else:
+                    value = val
+                self.set_pixel_value(x, y, value)
+
+class RenderCache:
+    """Bounded LRU cache of rendered framebuffers for FrameBuffer.draw_string_cached"""
+    ENTRY_OVERHEAD = 64 # Rough RAM cost of an entry besides its buffer and string
+
+    def __init__(self, max_bytes = 4096):
+        self.max_bytes = max_bytes
+        self.bytes_used = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        # key -> [last use, buffer, string length, size in bytes]
+        self._entries = {}
+        self._clock = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._clock += 1
+        entry[0] = self._clock
+        return entry
+
+    def put(self, key, buffer, string_length):
+        size = len(buffer) + len(key[0]) + self.ENTRY_OVERHEAD
+        if size > self.max_bytes:
+            return
+        self._remove(key)
+        while self.bytes_used + size > self.max_bytes:
+            self._evict()
+        self._clock += 1
+        self._entries[key] = [self._clock, buffer, string_length, size]
+        self.bytes_used += size
+
+    def clear(self):
+        self._entries = {}
+        self.bytes_used = 0
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes_used -= entry[3]
+
+    def _evict(self):
+        # Drop the least recently used entry
+        oldest = None
+        for key, entry in self._entries.items():
+            if oldest is None or entry[0] < self._entries[oldest][0]:
+                oldest = key
+        self._remove(oldest)
+        self.evictions += 1
+
+class font:
+    """Monospace or proportional font data and sizing info, read from a font module generated by font/fontgen.py"""
+    HEADER_SIZE = 5     # width, height, first character, glyph count, flags
+    WIDTHS = 0x01       # Flag: per-glyph widths follow the bitmaps
+
+    def __init__(self, fontdata):
+        # fontdata is indexed in place, no per-glyph objects are made
+        data = memoryview(fontdata)
+        self.width = data[0]
+        self.height = data[1]
+        self.first = data[2]
+        self.count = data[3]
+        end = self.HEADER_SIZE + self.count * self.height
+        self.bitmaptable = data[self.HEADER_SIZE:end]
+        self.widths = data[end:end + self.count] if data[4] & self.WIDTHS else None
+        self._rows = {}
+
+    def _glyph_index(self, character):
+        index = ord(character) - self.first
+        if index < 0 or index >= self.count:
+            index = ord('?') - self.first
+        return index
+
+    def advance(self, character):
+        # Columns the glyph takes up, before the blank one after it
+        if self.widths is None:
+            return self.width
+        return self.widths[self._glyph_index(character)]
+
+    def text_width(self, msg):
+        # Columns msg takes up, without a blank column at the end
+        if not msg:
+            return 0
+        width = len(msg) - 1
+        for c in msg:
+            width += self.advance(c)
+        return width
 
     def glyph(self, character):
-        index = ord(character) - 32
-        if index > len(self.bitmaptable):
-            index = ord('?')
-        glyph_bits = self.bitmaptable[index]
-        return glyph_bits
\ No newline at end of file
+        # Row bytes of the glyph, leftmost column in bit 7
+        start = self._glyph_index(character) * self.height
+        return self.bitmaptable[start:start + self.height]
+
+    def glyph_rows(self, character):
+        # The glyph expanded to width x height brightness bytes, ready to
+        # copy a row at a time. Expanded on first use and cached.
+        index = self._glyph_index(character)
+        rows = self._rows.get(index)
+        if rows is None:
+            glyph_bits = self.bitmaptable[index * self.height:]
+            expanded = bytearray(self.width * self.height)
+            for y in range(0, self.height):
+                for x in range(0, self.width):
+                    if glyph_bits[y] & (0b10000000 >> x):
+                        expanded[x + y * self.width] = 0xff
+            rows = memoryview(expanded)
+            self._rows[index] = rows
+        return rows
@@ -0,0 +1,37 @@
+import math
+
+PLASMA_FRAMES = 8   # The plasma repeats after this many frames
+
+# Sine table, one full turn in 256 steps, scaled to 0..255
+SINE = bytes(int(127.5 + 127.5 * math.sin(step * 2 * math.pi / 256)) for step in range(256))
+STEPS_PER_RADIAN = 256 / (2 * math.pi)
+
+def plasma(fb, frame):
+    # Draw one frame of the plasma effect into a 24x5 framebuffer
+    for x in range(0, 24):
+        xval = (x / 24) * 2
+        t = frame * 5
+        val = math.sin((xval) * 10 + t)
+        for y in range (0, 5):
+            v = math.sin(10*(xval*math.sin(t / 2) + y*math.cos(t/3) + t))
+            v = val + v
+            fb.set_pixel_value(x, y, int((v + 2)/4.0 * 255.0))
+
+def _sine_step(radians):
+    return int(radians * STEPS_PER_RADIAN) & 0xFF
+
+def render_plasma(fb):
+    # Draw every frame of the plasma loop side by side into a framebuffer
+    # PLASMA_FRAMES * 24 wide, ready to upload as a movie. Same effect as
+    # plasma(), with the per-pixel sines looked up in SINE.
+    for frame in range(0, PLASMA_FRAMES):
+        t = frame * 5
+        # Terms that only change from frame to frame
+        sin_t = math.sin(t / 2)
+        cos_t = math.cos(t / 3)
+        for x in range(0, 24):
+            xval = (x / 24) * 2
+            val = SINE[_sine_step(xval * 10 + t)]
+            for y in range(0, 5):
+                v = SINE[_sine_step(10 * (xval * sin_t + y * cos_t + t))]
+                fb.set_pixel_value(frame * 24 + x, y, (val + v) >> 1)
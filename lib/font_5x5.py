@@ -0,0 +1,107 @@
+# 5x5.ttf, generated by font/fontgen.py
+
+FONT = (
+    b'\x05\x05\x20\x5f\x01'
+    b'\x00\x00\x00\x00\x00' #  
+    b'\x80\x80\x80\x00\x80' # !
+    b'\xa0\x00\x00\x00\x00' # "
+    b'\x50\xf8\x50\xf8\x50' # #
+    b'\xf8\xa0\xf8\x28\xf8' # $
+    b'\x88\x10\x20\x40\x88' # %
+    b'\x60\x80\x68\x90\x68' # &
+    b'\x80\x00\x00\x00\x00' # '
+    b'\x40\x80\x80\x80\x40' # (
+    b'\x80\x40\x40\x40\x80' # )
+    b'\x40\x00\x00\x00\x00' # *
+    b'\x20\x20\xf8\x20\x20' # +
+    b'\x00\x00\x00\x00\x80' # ,
+    b'\x00\x00\xf8\x00\x00' # -
+    b'\x00\x00\x00\x00\x80' # .
+    b'\x20\x20\x40\x80\x80' # /
+    b'\xf8\x98\xa8\xc8\xf8' # 0
+    b'\x40\xc0\x40\x40\xe0' # 1
+    b'\xf0\x08\x70\x80\xf8' # 2
+    b'\xf8\x08\x70\x08\xf8' # 3
+    b'\x80\x80\xa0\xf8\x20' # 4
+    b'\xf8\x80\xf0\x08\xf0' # 5
+    b'\xf8\x80\xf8\x88\xf8' # 6
+    b'\xf8\x08\x10\x20\x20' # 7
+    b'\xf8\x88\xf8\x88\xf8' # 8
+    b'\xf8\x88\xf8\x08\xf8' # 9
+    b'\x80\x00\x00\x00\x80' # :
+    b'\x80\x00\x00\x00\x80' # ;
+    b'\x20\x40\x80\x40\x20' # <
+    b'\x00\xf8\x00\xf8\x00' # =
+    b'\x80\x40\x20\x40\x80' # >
+    b'\x60\x90\x20\x00\x20' # ?
+    b'\xf8\x88\xb8\x80\xf8' # @
+    b'\xf8\x88\x88\xf8\x88' # A
+    b'\xf8\x88\xf0\x88\xf8' # B
+    b'\xf8\x80\x80\x80\xf8' # C
+    b'\xf0\x88\x88\x88\xf0' # D
+    b'\xf8\x80\xf0\x80\xf8' # E
+    b'\xf8\x80\xf0\x80\x80' # F
+    b'\xf8\x80\x98\x88\xf8' # G
+    b'\x88\x88\xf8\x88\x88' # H
+    b'\xf8\x20\x20\x20\xf8' # I
+    b'\x18\x08\x08\x88\xf8' # J
+    b'\x88\x90\xe0\x90\x88' # K
+    b'\x80\x80\x80\x80\xf8' # L
+    b'\x88\xd8\xa8\x88\x88' # M
+    b'\x88\xc8\xa8\x98\x88' # N
+    b'\x70\x88\x88\x88\x70' # O
+    b'\xf0\x88\xf0\x80\x80' # P
+    b'\xf8\x88\x88\xf8\x20' # Q
+    b'\xf0\x88\xf0\x88\x88' # R
+    b'\xf8\x80\xf8\x08\xf8' # S
+    b'\xf8\x20\x20\x20\x20' # T
+    b'\x88\x88\x88\x88\xf8' # U
+    b'\x88\x88\x50\x50\x20' # V
+    b'\x88\x88\xa8\xa8\x50' # W
+    b'\x88\x50\x20\x50\x88' # X
+    b'\x88\x88\x50\x20\x20' # Y
+    b'\xf8\x10\x20\x40\xf8' # Z
+    b'\xc0\x80\x80\x80\xc0' # [
+    b'\x80\x80\x40\x20\x20' # \
+    b'\xc0\x40\x40\x40\xc0' # ]
+    b'\x00\x00\x00\x00\x00' # ^
+    b'\x00\x00\x00\x00\xf8' # _
+    b'\x00\x00\x00\x00\x00' # `
+    b'\xf8\x88\x88\xf8\x88' # a
+    b'\xf8\x88\xf0\x88\xf8' # b
+    b'\xf8\x80\x80\x80\xf8' # c
+    b'\xf0\x88\x88\x88\xf0' # d
+    b'\xf8\x80\xf0\x80\xf8' # e
+    b'\xf8\x80\xf0\x80\x80' # f
+    b'\xf8\x80\x98\x88\xf8' # g
+    b'\x88\x88\xf8\x88\x88' # h
+    b'\xf8\x20\x20\x20\xf8' # i
+    b'\x18\x08\x08\x88\xf8' # j
+    b'\x88\x90\xe0\x90\x88' # k
+    b'\x80\x80\x80\x80\xf8' # l
+    b'\x88\xd8\xa8\x88\x88' # m
+    b'\x88\xc8\xa8\x98\x88' # n
+    b'\x70\x88\x88\x88\x70' # o
+    b'\xf0\x88\xf0\x80\x80' # p
+    b'\xf8\x88\x88\xf8\x20' # q
+    b'\xf0\x88\xf0\x88\x88' # r
+    b'\xf8\x80\xf8\x08\xf8' # s
+    b'\xf8\x20\x20\x20\x20' # t
+    b'\x88\x88\x88\x88\xf8' # u
+    b'\x88\x88\x50\x50\x20' # v
+    b'\x88\x88\xa8\xa8\x50' # w
+    b'\x88\x50\x20\x50\x88' # x
+    b'\x88\x88\x50\x20\x20' # y
+    b'\xf8\x10\x20\x40\xf8' # z
+    b'\x60\x40\xc0\x40\x60' # {
+    b'\x80\x80\x00\x80\x80' # |
+    b'\xc0\x40\x60\x40\xc0' # }
+    b'\x00\x00\x00\x00\x00' # ~
+    # Advance widths
+    b'\x02\x01\x03\x05\x05\x05\x05\x01\x02\x02\x02\x05\x01\x05\x01\x03'
+    b'\x05\x03\x05\x05\x05\x05\x05\x05\x05\x05\x01\x01\x03\x05\x03\x04'
+    b'\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05'
+    b'\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x02\x03\x02\x02\x05'
+    b'\x02\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05'
+    b'\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x05\x03\x01\x03\x02'
+)
@@ -0,0 +1,94 @@
+import time
+
+try:
+    ticks_ns = time.monotonic_ns
+except AttributeError:
+    def ticks_ns():
+        return int(time.monotonic() * 1000000000)
+
+# Per call name: calls, nanoseconds, control writes, frame writes, PWM
+# writes, bytes sent, I2C transactions
+CALLS = 0
+NANOSECONDS = 1
+CONTROL = 2
+FRAME = 3
+PWM = 4
+BYTES = 5
+TRANSACTIONS = 6
+FIELDS = ('calls', 'ns', 'control', 'frame', 'pwm', 'bytes', 'transactions')
+OTHER = '(other)'   # Bus traffic outside any instrumented call
+
+class CallStats:
+    """Opt-in counters and timings for method calls, added by wrapping methods on an instance"""
+    def __init__(self):
+        self.records = {}
+        self._current = None    # Record of the outermost call in progress
+        self._wrapped = []      # (object, name) of every wrapped method
+
+    def wrap(self, obj, name, label = None):
+        # Count and time calls to obj.name under label (name by default).
+        # Calls made from inside another wrapped call are counted towards
+        # the outer one only.
+        method = getattr(obj, name)
+        record = self.record(label if label is not None else name)
+
+        def timed(*args, **kwargs):
+            if self._current is not None:
+                return method(*args, **kwargs)
+            self._current = record
+            start = ticks_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record[NANOSECONDS] += ticks_ns() - start
+                record[CALLS] += 1
+                self._current = None
+        self.replace(obj, name, timed)
+
+    def replace(self, obj, name, function):
+        # Put function in place of obj.name until unwrap()
+        setattr(obj, name, function)
+        self._wrapped.append((obj, name))
+
+    def unwrap(self):
+        # Put the original methods back
+        for obj, name in self._wrapped:
+            delattr(obj, name)
+        self._wrapped = []
+
+    def record(self, label):
+        record = self.records.get(label)
+        if record is None:
+            record = [0] * len(FIELDS)
+            self.records[label] = record
+        return record
+
+    def current(self):
+        # Record bus traffic is counted towards right now
+        if self._current is not None:
+            return self._current
+        return self.record(OTHER)
+
+    def reset(self):
+        for record in self.records.values():
+            for field in range(len(FIELDS)):
+                record[field] = 0
+
+    def snapshot(self):
+        # Copy of the counters: label -> {field: value}
+        stats = {}
+        for label, record in self.records.items():
+            stats[label] = dict(zip(FIELDS, record))
+        return stats
+
+    def log_line(self):
+        # One compact line: per call name the calls, total milliseconds,
+        # control/frame/PWM writes, bytes and transactions
+        parts = []
+        for label in sorted(self.records):
+            record = self.records[label]
+            if record[CALLS] or record[TRANSACTIONS]:
+                parts.append('%s %dx %dms %d/%d/%dw %dB %dt' % (
+                    label, record[CALLS], record[NANOSECONDS] // 1000000, record[CONTROL],
+                    record[FRAME], record[PWM], record[BYTES], record[TRANSACTIONS]))
+        return ' | '.join(parts)
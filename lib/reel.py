@@ -0,0 +1,55 @@
+import struct
+
+# Show reel file layout, all little endian:
+#   header  magic, version, frame bytes, frame height, frame width,
+#           title count, most frames in a title, index offset, size and
+#           CRC-32 of the titles file the reel was made from
+#   index   offset of each title's blob (uint32)
+#   blobs   string length (uint16), frame count (uint8), then the title's
+#           on/off frame images, FRAME_BYTES each
+MAGIC = b'TREL'
+VERSION = 2
+HEADER = '<4sBBBBHHIII'
+HEADER_SIZE = struct.calcsize(HEADER)
+BLOB_HEADER = '<HB'
+BLOB_HEADER_SIZE = struct.calcsize(BLOB_HEADER)
+
+class Reel:
+    """Reader for pre-rendered show reels made by tools/make_reel.py"""
+    def __init__(self, path):
+        self._file = open(path, 'rb')
+        header = self._file.read(HEADER_SIZE)
+        (magic, version, self.frame_bytes, self.height, self.frame_width,
+         self.count, self.max_frames, self._index, self.source_size,
+         self.source_crc) = struct.unpack(HEADER, header)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError("Not a show reel")
+        self._entry = bytearray(4)
+        self._blob_header = bytearray(BLOB_HEADER_SIZE)
+
+    def __len__(self):
+        return self.count
+
+    def matches(self, titlesource):
+        # Whether the reel was made from the titles titlesource reads,
+        # lines appended since aside
+        return (self.count <= len(titlesource)
+                and titlesource.checksum(self.source_size) == self.source_crc)
+
+    def buffer(self):
+        # A buffer big enough for any title's frame images
+        return bytearray(self.max_frames * self.frame_bytes)
+
+    def read_title(self, n, buffer):
+        # Read title n's frame images into buffer. Returns the string
+        # length in pixels and the number of frames.
+        self._file.seek(self._index + 4 * n)
+        self._file.readinto(self._entry)
+        self._file.seek(struct.unpack('<I', self._entry)[0])
+        self._file.readinto(self._blob_header)
+        string_length, frames = struct.unpack(BLOB_HEADER, self._blob_header)
+        self._file.readinto(memoryview(buffer)[0:frames * self.frame_bytes])
+        return string_length, frames
+
+    def close(self):
+        self._file.close()
@@ -0,0 +1,278 @@
+import asyncio
+import time
+
+import as1130
+import display
+import effects
+import font_5x5
+
+# Modes
+TITLES = 1
+PLASMA = 2
+
+TITLE_SECONDS = 5       # Each title stays on display this long
+START_SECONDS = 2       # Blank display before the first title
+RENDER_AHEAD = 2        # Titles rendered ahead of the one being staged
+STATS_SECONDS = 60      # Between call stats log lines
+
+class TaskQueue:
+    """Fixed size FIFO between tasks, as CircuitPython's asyncio has no Queue"""
+    def __init__(self, size):
+        self._items = [None] * size
+        self._head = 0
+        self._count = 0
+        self._changed = asyncio.Event()
+
+    def __len__(self):
+        return self._count
+
+    async def put(self, item):
+        while self._count == len(self._items):
+            await self._wait()
+        self.put_nowait(item)
+
+    def put_nowait(self, item):
+        if self._count == len(self._items):
+            raise IndexError("Queue full")
+        self._items[(self._head + self._count) % len(self._items)] = item
+        self._count += 1
+        self._changed.set()
+
+    async def get(self):
+        while not self._count:
+            await self._wait()
+        item = self._items[self._head]
+        self._items[self._head] = None
+        self._head = (self._head + 1) % len(self._items)
+        self._count -= 1
+        self._changed.set()
+        return item
+
+    async def _wait(self):
+        self._changed.clear()
+        await self._changed.wait()
+
+class Show:
+    """The title show and plasma effect as cooperative asyncio tasks"""
+    # In title mode a producer renders titles ahead into a small queue, an
+    # uploader stages each one in the chip's back frames while the current
+    # title plays, and a display timer swaps them in on time. run() is the
+    # mode controller.
+    def __init__(self, led, titlesource, titlereel = None, mode = TITLES, shuffle = False,
+                 title_seconds = TITLE_SECONDS, start_seconds = START_SECONDS,
+                 render_ahead = RENDER_AHEAD, stats = None, stats_seconds = STATS_SECONDS):
+        self.led = led
+        self.titlesource = titlesource
+        if titlereel is not None and not self._reel_fits(titlereel):
+            print("Show reel does not match the titles, not used")
+            titlereel = None
+        self.titlereel = titlereel
+        self.mode = mode
+        self.shuffle = shuffle
+        self.title_seconds = title_seconds
+        self.start_seconds = start_seconds
+        self._mode_changed = asyncio.Event()
+        self._tasks = []
+
+        self._font = display.font(font_5x5.FONT)
+        self._render_cache = display.RenderCache(8192)
+        # Titles are on/off only. Each buffer goes from the free queue to
+        # the producer, through the ready queue to the uploader and back.
+        self._buffers = [display.MonoFrameBuffer(24*8, 5) for _ in range(render_ahead + 1)]
+        # With an instrument.CallStats, such as the one from
+        # led.enable_stats(), title rendering is timed too and the
+        # counters are logged every stats_seconds
+        self.stats = stats
+        self.stats_seconds = stats_seconds
+        if stats is not None:
+            for fb in self._buffers:
+                stats.wrap(fb, 'draw_string')
+        self._free = None
+        self._ready = None
+        self._staged = None     # Set while a title waits in the back frames
+        self._swapped = None    # Set once the display timer has shown it
+
+        # Titles pre-rendered by tools/make_reel.py skip layout and encoding
+        self._reel_buffer = None
+        self._reel_titles = 0
+        if titlereel is not None:
+            self._reel_buffer = titlereel.buffer()
+            self._reel_titles = len(titlereel)
+        self.reset_metrics()
+
+    def _reel_fits(self, titlereel):
+        # A reel is only played if it holds 24x5 frames made from the
+        # titles being shown
+        return (titlereel.frame_width == 24 and titlereel.height == 5
+                and titlereel.frame_bytes == as1130.FRAME_BYTES
+                and titlereel.matches(self.titlesource))
+
+    def reset_metrics(self):
+        # Times are in seconds, from time.monotonic()
+        self.metrics = {
+            'titles': 0,            # Titles swapped in
+            'late': 0,              # Of those, not staged by their deadline
+            'lateness_max': 0.0,    # Worst swap after its deadline
+            'lateness_total': 0.0,
+            'render_time': 0.0,     # Spent rendering titles
+            'upload_time': 0.0,     # Spent staging titles on the chip
+            'cache_hits': 0,        # Titles still in the chip's frames
+        }
+
+    def set_mode(self, mode):
+        if mode != self.mode:
+            self.mode = mode
+            self._mode_changed.set()
+
+    async def run(self):
+        # Mode controller: runs the current mode's tasks until set_mode()
+        # picks another one
+        if self.stats is not None:
+            asyncio.create_task(self._log_stats())
+        while True:
+            self._mode_changed.clear()
+            if self.mode == TITLES:
+                await self._start_titles()
+            else:
+                await self._start_plasma()
+            await self._mode_changed.wait()
+            for task in self._tasks:
+                task.cancel()
+            self._tasks = []
+
+    async def _log_stats(self):
+        while True:
+            await asyncio.sleep(self.stats_seconds)
+            print(self.stats.log_line())
+
+    async def _start_titles(self):
+        led = self.led
+        led.set_ram_config(1)
+        led.set_frame_delay(1)
+        fb = self._buffers[0]
+        fb.clear_buffer()
+        led.draw_framebuffer(fb, 0)
+        await asyncio.sleep(self.start_seconds)
+        led.play_movie(False)
+        led.set_scrolling(True)
+        led.play_movie(True)
+
+        self._free = TaskQueue(len(self._buffers))
+        for fb in self._buffers:
+            self._free.put_nowait(fb)
+        self._ready = TaskQueue(len(self._buffers) - 1)
+        self._staged = asyncio.Event()
+        self._swapped = asyncio.Event()
+        self._tasks = [asyncio.create_task(self._produce()),
+                       asyncio.create_task(self._upload()),
+                       asyncio.create_task(self._display())]
+
+    async def _start_plasma(self):
+        # Render the whole plasma loop once and let the chip's movie mode
+        # play it, one PWM set per frame
+        led = self.led
+        led.set_ram_config(3)   # 24 frames, 12 PWM sets
+        fb = display.FrameBuffer(24*effects.PLASMA_FRAMES, 5)
+        effects.render_plasma(fb)
+        led.set_scrolling(False)
+        led.set_frame_delay(3)
+        led.draw_framebuffer(fb, 0, True)
+        led.play_movie(True)
+
+    async def _produce(self):
+        # Render titles ahead into free framebuffers. Titles on the reel
+        # need no rendering.
+        playlist = self.titlesource.numbers(self.shuffle)
+        while True:
+            await self._poll()
+            number = next(playlist, None)
+            if number is None:
+                # Start over, reshuffled if shuffling
+                playlist = self.titlesource.numbers(self.shuffle)
+                number = next(playlist, None)
+                if number is None:
+                    await asyncio.sleep(self.title_seconds)
+                    continue
+
+            fb = None
+            string_length = 0
+            if number >= self._reel_titles:
+                fb = await self._free.get()
+                started = time.monotonic()
+                # A playlist is far longer than the render cache holds, so
+                # only titles _poll() rendered ahead are looked up there
+                string_length = fb.draw_string_cached(0, 0, self.titlesource.get(number),
+                                                      self._font, self._render_cache,
+                                                      store=False)
+                self.metrics['render_time'] += time.monotonic() - started
+            await self._ready.put((number, fb, string_length))
+            await asyncio.sleep(0)
+
+    async def _poll(self):
+        # Pick up titles appended to the file, keeping everything before
+        # them cached and the playlist where it is, and render the new
+        # ones ahead into the render cache, as many as it holds
+        changed = self.titlesource.poll()
+        if changed is None:
+            return
+        self._reel_titles = min(self._reel_titles, changed)
+        fb = await self._free.get()
+        cache = self._render_cache
+        evictions = cache.evictions
+        for number in range(changed, len(self.titlesource)):
+            self.led.frame_cache.discard(number)
+            if cache.evictions == evictions:
+                fb.draw_string_cached(0, 0, self.titlesource.get(number), self._font, cache)
+            await asyncio.sleep(0)
+        self._free.put_nowait(fb)
+
+    async def _upload(self):
+        # Stage each title in frames that are not on display, then wait
+        # for the display timer to swap it in before staging the next
+        led = self.led
+        while True:
+            number, fb, string_length = await self._ready.get()
+            started = time.monotonic()
+            if led.stage_cached(number):
+                self.metrics['cache_hits'] += 1
+            elif fb is None:
+                # Straight from the reel file to the chip
+                string_length, frames = self.titlereel.read_title(number, self._reel_buffer)
+                led.stage_frame_images(self._reel_buffer, frames, 5, key=number,
+                                       clip_to_x=string_length)
+            else:
+                led.stage_framebuffer(fb, string_length, key=number)
+            self.metrics['upload_time'] += time.monotonic() - started
+            if fb is not None:
+                self._free.put_nowait(fb)
+
+            self._swapped.clear()
+            self._staged.set()
+            await self._swapped.wait()
+
+    async def _display(self):
+        # Swap in the staged title every title_seconds. Deadlines are kept
+        # on time.monotonic() so rendering and uploading do not add to
+        # the time a title is shown; a late title restarts the count.
+        metrics = self.metrics
+        deadline = None
+        while True:
+            late = not self._staged.is_set()
+            await self._staged.wait()
+            self._staged.clear()
+            self.led.swap()
+            now = time.monotonic()
+            self._swapped.set()
+
+            metrics['titles'] += 1
+            if deadline is not None:
+                lateness = now - deadline
+                metrics['lateness_total'] += lateness
+                if lateness > metrics['lateness_max']:
+                    metrics['lateness_max'] = lateness
+                if late:
+                    metrics['late'] += 1
+            if deadline is None or late:
+                deadline = now
+            deadline += self.title_seconds
+            await asyncio.sleep(max(0, deadline - time.monotonic()))
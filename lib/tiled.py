@@ -0,0 +1,155 @@
+try:
+    import threading
+except ImportError:
+    threading = None    # CircuitPython: the chips are uploaded one after another
+
+from as1130 import SYNC_IN, SYNC_OUT
+
+class TiledFrameCache:
+    """The frame caches of the chips of a TiledDisplay, kept in step"""
+    def __init__(self, leds):
+        self._leds = leds
+
+    def lookup(self, key):
+        # Every chip allocates the same way, the first one speaks for all
+        return self._leds[0].frame_cache.lookup(key)
+
+    def discard(self, key):
+        for led in self._leds:
+            led.frame_cache.discard(key)
+
+    def clear(self):
+        for led in self._leds:
+            led.frame_cache.clear()
+
+class TiledDisplay:
+    """Several AS1130s side by side, driven as one display 24 columns per chip wide"""
+    # Every chip holds the whole title, its movie starting one frame
+    # further in than the chip to its left. With the movies in step each
+    # chip shows its own 24 columns, and hardware scrolling carries on
+    # across the chips. Has the drawing and movie calls of the AS1130
+    # driver, so the show can drive it the same way.
+    def __init__(self, leds, buses = None, sync = True):
+        # leds are the drivers from left to right. buses gives the bus of
+        # each chip, anything that compares equal for chips sharing one;
+        # chips on different buses are uploaded at the same time where
+        # there are threads. sync runs every chip from the first one's
+        # clock, which needs their SYNC pins connected.
+        self.leds = list(leds)
+        self.width = 24 * len(self.leds)
+        self.frame_cache = TiledFrameCache(self.leds)
+
+        if buses is None:
+            buses = [None] * len(self.leds)
+        groups = {}
+        for index, bus in enumerate(buses):
+            groups.setdefault(bus, []).append(index)
+        self._groups = list(groups.values())
+
+        if sync:
+            for index, led in enumerate(self.leds):
+                led.set_clock_sync(SYNC_OUT if index == 0 else SYNC_IN)
+
+    def draw_framebuffer(self, framebuffer, clip_to_x = 0, use_pwm = False, key = None):
+        self.stage_framebuffer(framebuffer, clip_to_x, use_pwm, key)
+        self.swap()
+
+    def stage_framebuffer(self, framebuffer, clip_to_x = 0, use_pwm = False, key = None):
+        # The framebuffer has to be at least as wide as the display
+        self._check_frames(int(framebuffer.width / 24))
+        clip_to_x = self._clip(framebuffer.width, clip_to_x)
+        self._upload(lambda led, index:
+                     led.stage_framebuffer(framebuffer, clip_to_x, use_pwm, key, index))
+
+    def draw_frame_images(self, images, numberofframes, height = 5, key = None, clip_to_x = 0):
+        self.stage_frame_images(images, numberofframes, height, key, clip_to_x)
+        self.swap()
+
+    def stage_frame_images(self, images, numberofframes, height = 5, key = None, clip_to_x = 0):
+        self._check_frames(numberofframes)
+        clip_to_x = self._clip(24 * numberofframes, clip_to_x)
+        self._upload(lambda led, index:
+                     led.stage_frame_images(images, numberofframes, height, key, clip_to_x, index))
+
+    def show_cached(self, key):
+        if not self.stage_cached(key):
+            return False
+        self.swap()
+        return True
+
+    def stage_cached(self, key):
+        # Only if every chip still has it
+        for led in self.leds:
+            if led.frame_cache.lookup(key) is None:
+                return False
+        for led in self.leds:
+            led.stage_cached(key)
+        return True
+
+    def swap(self):
+        # Back to back, so the movies restart as close together as the
+        # bus allows
+        swapped = False
+        for led in self.leds:
+            if led.swap():
+                swapped = True
+        return swapped
+
+    def play_movie(self, play):
+        for led in self.leds:
+            led.play_movie(play)
+
+    def set_ram_config(self, ram_config):
+        for led in self.leds:
+            led.set_ram_config(ram_config)
+
+    def set_scrolling(self, enable):
+        for led in self.leds:
+            led.set_scrolling(enable)
+
+    def set_frame_delay(self, delay):
+        for led in self.leds:
+            led.set_frame_delay(delay)
+
+    def set_current(self, milliAmps):
+        for led in self.leds:
+            led.set_current(milliAmps)
+
+    def invalidate(self):
+        for led in self.leds:
+            led.invalidate()
+
+    def _check_frames(self, numberofframes):
+        if numberofframes < len(self.leds):
+            raise ValueError("Frames narrower than the display")
+
+    def _clip(self, width, clip_to_x):
+        # Every chip needs a window of its own, even for a short title
+        if clip_to_x <= 0:
+            return 0
+        return max(clip_to_x, min(width, self.width))
+
+    def _upload(self, upload):
+        # Run upload(led, index) for every chip, the chips of each bus in
+        # a thread of their own
+        if threading is None or len(self._groups) == 1:
+            for index, led in enumerate(self.leds):
+                upload(led, index)
+            return
+
+        errors = []
+        def run(group):
+            try:
+                for index in group:
+                    upload(self.leds[index], index)
+            except Exception as error:
+                errors.append(error)
+
+        threads = [threading.Thread(target=run, args=(group,)) for group in self._groups[1:]]
+        for thread in threads:
+            thread.start()
+        run(self._groups[0])
+        for thread in threads:
+            thread.join()
+        if errors:
+            raise errors[0]
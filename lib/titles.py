@@ -0,0 +1,191 @@
+import array
+import binascii
+import os
+import random
+import struct
+import time
+
+# Sidecar index layout, little endian: magic, size and mtime of the titles
+# file it was built from, line count, then line count + 1 offsets (uint32),
+# the last one being the end of the last line
+INDEX_MAGIC = b'TIDX'
+INDEX_HEADER = '<4sIII'
+INDEX_HEADER_SIZE = struct.calcsize(INDEX_HEADER)
+SCAN_CHUNK = 256
+POLL_INTERVAL = 10          # Seconds between checks for a changed titles file
+
+class TitleSource:
+    """Random access to the lines of a titles file through an offset index"""
+    def __init__(self, path, index_path = None, poll_interval = POLL_INTERVAL):
+        # The index is kept in index_path (path + '.idx' by default) and
+        # reused while the titles file keeps its size and mtime
+        self.path = path
+        self.index_path = index_path if index_path is not None else path + '.idx'
+        self.poll_interval = poll_interval
+        self._next_poll = time.monotonic() + poll_interval
+        self._file = open(path, 'rb')
+        self._offsets = array.array('I')
+        self._size, self._mtime = self._stat()
+        if not self._load_index():
+            self._scan(0)
+            self._save_index()
+        # The last indexed line as it was, to tell appending from editing
+        self._last_line = self._read_last_line()
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def get(self, n):
+        # Line n, without its line ending
+        start = self._offsets[n]
+        self._file.seek(start)
+        line = self._file.read(self._offsets[n + 1] - start)
+        return line.decode('utf-8').rstrip('\r\n')
+
+    def numbers(self, shuffle = False):
+        # Every line number once, in file order or shuffled. Lines that
+        # poll() finds appended meanwhile are still included, last.
+        count = 0
+        if shuffle:
+            count = len(self)
+            order = array.array('H' if count <= 0xFFFF else 'I', range(count))
+            for i in range(count - 1, 0, -1):
+                j = random.randint(0, i)
+                order[i], order[j] = order[j], order[i]
+            for n in order:
+                # Gone if the file was rewritten shorter
+                if n < len(self):
+                    yield n
+        n = count
+        while n < len(self):
+            yield n
+            n += 1
+
+    def shuffle_iter(self):
+        for n in self.numbers(True):
+            yield self.get(n)
+
+    def poll(self):
+        # Check the titles file for changes, at most every poll_interval
+        # seconds. Returns None if unchanged, else the first line number
+        # whose text may have changed; lines before it are as they were.
+        # Appended lines are indexed without rereading the rest of the
+        # file, any other change indexes it again from the start.
+        now = time.monotonic()
+        if now < self._next_poll:
+            return None
+        self._next_poll = now + self.poll_interval
+        try:
+            size, mtime = self._stat()
+        except OSError:
+            return None
+        if size == self._size and mtime == self._mtime:
+            return None
+
+        # The file may have been replaced rather than written to
+        self._file.close()
+        self._file = open(self.path, 'rb')
+        first = self._appended_from(size)
+        if first is None:
+            first = 0
+        start = self._offsets[first] if first else 0
+        # Slicing, as MicroPython's array has no pop()
+        self._offsets = self._offsets[:first]
+        self._size, self._mtime = size, mtime
+        self._scan(start)
+        self._save_index()
+        self._last_line = self._read_last_line()
+        return first
+
+    def checksum(self, size):
+        # CRC-32 of the first size bytes of the titles file, as
+        # tools/make_reel.py records it for the file a reel is made from
+        crc = 0
+        chunk = bytearray(SCAN_CHUNK)
+        self._file.seek(0)
+        while size > 0:
+            count = self._file.readinto(chunk)
+            if not count:
+                break
+            count = min(count, size)
+            crc = binascii.crc32(memoryview(chunk)[0:count], crc)
+            size -= count
+        return crc
+
+    def close(self):
+        self._file.close()
+
+    def _stat(self):
+        st = os.stat(self.path)
+        return st[6], int(st[8])
+
+    def _scan(self, start):
+        # Index the lines from byte offset start, which begins a line,
+        # after the offsets of the lines before it
+        self._offsets.append(start)
+        chunk = bytearray(SCAN_CHUNK)
+        self._file.seek(start)
+        position = start
+        while True:
+            count = self._file.readinto(chunk)
+            if not count:
+                break
+            for i in range(count):
+                if chunk[i] == 0x0A:
+                    self._offsets.append(position + i + 1)
+            position += count
+        # A last line without a line ending still counts
+        if position > self._offsets[-1]:
+            self._offsets.append(position)
+
+    def _appended_from(self, size):
+        # Number of the first line to index again if the file only grew,
+        # the last line included when it had no line ending yet, or None
+        # if it has to be indexed from scratch. Growing is only taken for
+        # appending while the last indexed line is still where it was;
+        # an earlier line edited longer moves it.
+        end = self._offsets[-1] if len(self._offsets) else 0
+        if size < end:
+            return None
+        if end == 0:
+            return 0
+        if self._read_last_line() != self._last_line:
+            return None
+        if self._last_line[-1:] == b'\n':
+            return len(self)
+        return len(self) - 1
+
+    def _read_last_line(self):
+        # The last indexed line as the file holds it now, line ending
+        # included
+        if len(self) < 1:
+            return b''
+        start = self._offsets[-2]
+        self._file.seek(start)
+        return self._file.read(self._offsets[-1] - start)
+
+    def _load_index(self):
+        try:
+            with open(self.index_path, 'rb') as f:
+                header = f.read(INDEX_HEADER_SIZE)
+                if len(header) != INDEX_HEADER_SIZE:
+                    return False
+                magic, size, mtime, count = struct.unpack(INDEX_HEADER, header)
+                if magic != INDEX_MAGIC or size != self._size or mtime != self._mtime:
+                    return False
+                offsets = array.array('I', (0 for _ in range(count + 1)))
+                if f.readinto(offsets) != 4 * (count + 1):
+                    return False
+        except OSError:
+            return False
+        self._offsets = offsets
+        return True
+
+    def _save_index(self):
+        # Best effort, the board's filesystem is usually read-only
+        try:
+            with open(self.index_path, 'wb') as f:
+                f.write(struct.pack(INDEX_HEADER, INDEX_MAGIC, self._size, self._mtime, len(self)))
+                f.write(self._offsets)
+        except OSError:
+            pass
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+#
+# Benchmarks for the render and upload pipeline
+#
+# Runs on CPython against the emulated AS1130 bus, using the titles in
+# show_titles.txt at several framebuffer widths. Results are written as
+# JSON; --compare flags cases that got slower or send more bus bytes than
+# an earlier run.
+#
+#   python3 tools/bench.py -o before.json
+#   python3 tools/bench.py -o after.json --compare before.json
+#
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+
+import display
+import effects
+import font_5x5
+from as1130_emulator import AS1130_Emulator
+
+WIDTHS = (24 * 4, 24 * 8, 24 * 12)
+# Peak bytes a steady-state frame may allocate: room for CPython's
+# short-lived int and iterator objects, far below any buffer
+ALLOC_SLACK = 512
+TITLES_FILE = os.path.join(ROOT, 'show_titles.txt')
+
+
+def load_titles():
+    with open(TITLES_FILE, encoding='utf-8') as f:
+        return [line.rstrip('\n') for line in f if line.strip()]
+
+
+def load_font():
+    return display.font(font_5x5.FONT)
+
+
+def cycle(items):
+    # Endless iterator over items, cheap enough not to skew timings
+    state = [0]
+
+    def next_item():
+        item = items[state[0]]
+        state[0] = (state[0] + 1) % len(items)
+        return item
+    return next_item
+
+
+def measure(fn, min_time, repeats=5):
+    # Best calls per second out of several runs sharing min_time, which
+    # is less noisy than the mean, then the memory one call allocates at
+    # its peak and keeps allocated
+    fn()
+    best = 0.0
+    for _ in range(repeats):
+        calls = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            calls += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time / repeats:
+                break
+        best = max(best, calls / elapsed)
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    fn()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'ops_per_sec': best,
+        'alloc_peak_bytes': peak - before,
+        'alloc_net_bytes': after - before,
+    }
+
+
+def bus_cost(led, fn, calls):
+    # Average bus traffic per call, starting from a freshly configured
+    # chip with an empty frame cache, whatever the timing runs left
+    # behind. fn must be fresh so every run uploads the same sequence.
+    led.set_ram_config(led.ram_config)
+    led.reset_counters()
+    for _ in range(calls):
+        fn()
+    return {
+        'bus_bytes_per_frame': led.bytes_sent / calls,
+        'transactions_per_frame': led.transactions / calls,
+        'bus_seconds_per_frame': led.bus_time / calls,
+    }
+
+
+def run(min_time, pattern):
+    titles = load_titles()
+    ledfont = load_font()
+    led = AS1130_Emulator()
+    results = {}
+    failures = []
+
+    def case(name, make_fn, upload_calls=0):
+        # make_fn returns the function to benchmark, a new one per run. A
+        # case that raises is reported and the rest still run.
+        if pattern and pattern not in name:
+            return
+        try:
+            result = measure(make_fn(), min_time)
+            if upload_calls:
+                result.update(bus_cost(led, make_fn(), upload_calls))
+        except Exception as error:
+            print('%-28s FAILED %s: %s' % (name, type(error).__name__, error))
+            failures.append(name)
+            return
+        results[name] = result
+        print('%-28s %12.1f ops/s %8d B peak' %
+              (name, result['ops_per_sec'], result['alloc_peak_bytes']))
+
+    def glyphs():
+        next_title = cycle(titles)
+        return lambda: [ledfont.glyph(c) for c in next_title()]
+    case('font.glyph', glyphs)
+
+    for width in WIDTHS:
+        fb = display.FrameBuffer(width, 5)
+        glyph = ledfont.glyph('A')
+        case('clear_buffer[%d]' % width, lambda: fb.clear_buffer)
+        case('blit[%d]' % width,
+             lambda: lambda: fb.blit(0, 0, glyph, ledfont.width, ledfont.height))
+
+        def draw_string():
+            next_title = cycle(titles)
+
+            def draw():
+                fb.clear_buffer()
+                fb.draw_string(0, 0, next_title(), ledfont)
+            return draw
+        case('draw_string[%d]' % width, draw_string)
+
+        # Pre-rendered titles so only the upload is timed
+        rendered = []
+        for title in titles:
+            title_fb = display.FrameBuffer(width, 5)
+            title_fb.clear_buffer()
+            length = title_fb.draw_string(0, 0, title, ledfont)
+            rendered.append((title_fb, length))
+
+        for use_pwm in (False, True):
+            def upload():
+                next_rendered = cycle(rendered)
+
+                def draw():
+                    title_fb, length = next_rendered()
+                    led.draw_framebuffer(title_fb, length, use_pwm)
+                return draw
+            name = 'draw_framebuffer%s[%d]' % ('_pwm' if use_pwm else '', width)
+            case(name, upload, len(rendered))
+
+        # The same titles in the packed on/off layout
+        packed = []
+        for title in titles:
+            title_fb = display.MonoFrameBuffer(width, 5)
+            title_fb.clear_buffer()
+            length = title_fb.draw_string(0, 0, title, ledfont)
+            packed.append((title_fb, length))
+
+        def upload_packed():
+            next_packed = cycle(packed)
+
+            def draw():
+                title_fb, length = next_packed()
+                led.draw_framebuffer(title_fb, length)
+            return draw
+        case('draw_framebuffer_mono[%d]' % width, upload_packed, len(packed))
+
+    plasma_fb = display.FrameBuffer(24, 5)
+
+    def plasma():
+        frame = [0]
+
+        def draw():
+            frame[0] = (frame[0] + 1) % 8
+            effects.plasma(plasma_fb, frame[0])
+            led.draw_framebuffer(plasma_fb, 0, True)
+        return draw
+    case('plasma_frame', plasma, 8)
+
+    # What the show does when it starts the plasma: render the whole loop
+    # and upload it once as a PWM movie
+    led.set_ram_config(3)
+    movie_fb = display.FrameBuffer(24 * effects.PLASMA_FRAMES, 5)
+
+    def plasma_movie():
+        def draw():
+            effects.render_plasma(movie_fb)
+            led.draw_framebuffer(movie_fb, 0, True)
+        return draw
+    case('plasma_movie', plasma_movie, 1)
+
+    return results, failures
+
+
+def check_allocations(frames=50):
+    # Steady-state uploads must not allocate buffers or keep memory.
+    # Returns the failures.
+    titles = load_titles()
+    ledfont = load_font()
+    led = AS1130_Emulator()
+    failures = []
+
+    # Memory kept by the driver and display code; the emulator's own
+    # counters are allowed to grow
+    ignore = [tracemalloc.Filter(True, os.path.join(ROOT, 'lib', '*')),
+              tracemalloc.Filter(False, '*as1130_emulator.py')]
+
+    def check(name, fn):
+        for _ in range(frames):
+            fn()
+
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(frames):
+            fn()
+        peak = tracemalloc.get_traced_memory()[1] - before
+        tracemalloc.stop()
+
+        # Traced from before the compared window, so objects that are
+        # only replaced by new ones (such as counters) cancel out
+        tracemalloc.start()
+        for _ in range(frames):
+            fn()
+        start = tracemalloc.take_snapshot().filter_traces(ignore)
+        for _ in range(frames):
+            fn()
+        end = tracemalloc.take_snapshot().filter_traces(ignore)
+        tracemalloc.stop()
+        kept = sum(stat.size_diff for stat in end.compare_to(start, 'filename'))
+
+        print('%-28s %8d B peak %8d B kept' % (name, peak, kept))
+        if kept > 0 or peak > ALLOC_SLACK:
+            failures.append(name)
+
+    plasma_fb = display.FrameBuffer(24, 5)
+    frame = [0]
+
+    def plasma():
+        frame[0] = (frame[0] + 1) % 8
+        effects.plasma(plasma_fb, frame[0])
+        led.draw_framebuffer(plasma_fb, 0, True)
+    check('plasma_frame', plasma)
+
+    title_fbs = []
+    for title in titles[:8]:
+        title_fb = display.FrameBuffer(24 * 8, 5)
+        title_fb.clear_buffer()
+        title_fbs.append((title_fb, title_fb.draw_string(0, 0, title, ledfont)))
+    next_title = cycle(title_fbs)
+
+    def upload():
+        title_fb, length = next_title()
+        led.draw_framebuffer(title_fb, length)
+    check('draw_framebuffer[192]', upload)
+    return failures
+
+
+def check_linux_backend():
+    # Drive lib/as1130_linux.py with its ioctl replaced by one that replays
+    # every batched I2C message into an emulator, alongside an emulator
+    # driven directly. Both chips must end up the same, and control calls
+    # must take one ioctl each. Returns the failures.
+    import as1130_linux
+    from as1130 import REGREG
+
+    titles = load_titles()
+    ledfont = load_font()
+    replayed = AS1130_Emulator()
+    ioctls = [0]
+
+    def ioctl(fd, request, rdwr):
+        ioctls[0] += 1
+        for index in range(rdwr.nmsgs):
+            message = rdwr.msgs[index]
+            data = bytes(message.buf[0:message.len])
+            if len(data) == 2 and data[0] == REGREG:
+                replayed._write_register_byte(data[0], data[1])
+            else:
+                replayed._write_block(data[0], data, 1)
+
+    linux = as1130_linux.AS1130_Linux(ioctl=ioctl, opener=lambda path: -1,
+                                      closer=lambda fd: None)
+    direct = AS1130_Emulator()
+    failures = []
+
+    def both(call):
+        call(direct)
+        before = ioctls[0]
+        call(linux)
+        return ioctls[0] - before
+
+    def check_ioctls(name, call):
+        count = both(call)
+        print('%-28s %8d ioctls' % (name, count))
+        if count != 1:
+            failures.append('%s: %d ioctls' % (name, count))
+
+    for number, title in enumerate(titles[:40]):
+        fb = (display.MonoFrameBuffer if number % 2 else display.FrameBuffer)(24 * 8, 5)
+        fb.clear_buffer()
+        length = fb.draw_string(0, 0, title, ledfont)
+        both(lambda led: led.stage_framebuffer(fb, length, key=number))
+        both(lambda led: led.swap())
+
+    def swap_back(led):
+        # Back to the title before, still in the frame cache
+        led.stage_cached(38)
+        led.swap()
+    check_ioctls('swap', swap_back)
+    check_ioctls('play_movie', lambda led: led.play_movie(True))
+    check_ioctls('set_frame_delay', lambda led: led.set_frame_delay(3))
+    check_ioctls('set_ram_config', lambda led: led.set_ram_config(3))
+
+    movie_fb = display.FrameBuffer(24 * effects.PLASMA_FRAMES, 5)
+    effects.render_plasma(movie_fb)
+    both(lambda led: led.draw_framebuffer(movie_fb, 0, True))
+    linux.close()
+
+    same = (replayed.frames == direct.frames and replayed.control == direct.control
+            and replayed.pwm_sets == direct.pwm_sets)
+    print('%-28s %8s' % ('replayed RAM', 'same' if same else 'DIFFERS'))
+    if not same:
+        failures.append('replayed RAM differs')
+    return failures
+
+
+def compare(results, baseline, threshold):
+    # Cases that lost more than threshold of their speed, or that send
+    # more bus bytes per frame (deterministic, so any increase counts)
+    regressions = []
+    for name, result in sorted(results.items()):
+        old = baseline.get(name)
+        if old is None:
+            continue
+        if result['ops_per_sec'] < old['ops_per_sec'] * (1.0 - threshold):
+            regressions.append('%s: %.1f -> %.1f ops/s' %
+                               (name, old['ops_per_sec'], result['ops_per_sec']))
+        # Only against a baseline that measured the bus too
+        if 'bus_bytes_per_frame' not in old:
+            continue
+        if result.get('bus_bytes_per_frame', 0) > old['bus_bytes_per_frame']:
+            regressions.append('%s: %.1f -> %.1f bus bytes/frame' %
+                               (name, old['bus_bytes_per_frame'],
+                                result.get('bus_bytes_per_frame', 0)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the render and upload pipeline')
+    parser.add_argument('-o', '--output', default='bench_results.json',
+                        help='where to write the results (JSON)')
+    parser.add_argument('-k', dest='pattern', default='',
+                        help='only run cases whose name contains this')
+    parser.add_argument('--min-time', type=float, default=0.5,
+                        help='seconds to spend timing each case')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='earlier results file to check for regressions')
+    parser.add_argument('--threshold', type=float, default=0.10,
+                        help='allowed ops/sec loss as a fraction (default 0.10)')
+    parser.add_argument('--check-alloc', action='store_true',
+                        help='only check that steady-state frames do not allocate')
+    parser.add_argument('--check-linux', action='store_true',
+                        help='only check the Linux i2c-dev backend against the emulator')
+    args = parser.parse_args()
+
+    if args.check_alloc:
+        failures = check_allocations()
+        for name in failures:
+            print('ALLOCATES ' + name)
+        sys.exit(1 if failures else 0)
+
+    if args.check_linux:
+        failures = check_linux_backend()
+        for line in failures:
+            print('FAILED ' + line)
+        sys.exit(1 if failures else 0)
+
+    results, failures = run(args.min_time, args.pattern)
+    with open(args.output, 'w') as f:
+        json.dump({'python': sys.version.split()[0], 'results': results}, f,
+                  indent=2, sort_keys=True)
+    for name in failures:
+        print('FAILED ' + name)
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.threshold)
+        for line in regressions:
+            print('REGRESSION ' + line)
+        if regressions:
+            sys.exit(1)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
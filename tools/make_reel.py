@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+#
+# Show reel compiler
+#
+# Renders every title in a titles file through display.FrameBuffer and the
+# 5x5 font, encodes it into the AS1130 on/off frame images the driver
+# would upload, and writes them all to one binary reel file (see
+# lib/reel.py for the layout). The device can then read a title straight
+# into a buffer and send it to the chip with draw_frame_images().
+#
+#   python3 tools/make_reel.py show_titles.txt -o show_reel.bin
+#
+
+import argparse
+import binascii
+import multiprocessing
+import os
+import struct
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+
+import as1130
+import display
+import font_5x5
+import reel
+
+FRAME_WIDTH = 24
+HEIGHT = 5
+
+# Per worker process, set up by _init_worker
+_font = None
+_width = None
+
+
+def _init_worker(width):
+    global _font, _width
+    _font = display.font(font_5x5.FONT)
+    _width = width
+
+
+def render_title(title):
+    # One title's blob: string length, frame count and on/off images
+    fb = display.FrameBuffer(_width, HEIGHT)
+    fb.clear_buffer()
+    string_length = fb.draw_string(0, 0, title, _font)
+
+    frames = _width // FRAME_WIDTH
+    blob = bytearray(reel.BLOB_HEADER_SIZE + frames * as1130.FRAME_BYTES)
+    struct.pack_into(reel.BLOB_HEADER, blob, 0, string_length, frames)
+    for frame in range(frames):
+        onoff = memoryview(blob)[reel.BLOB_HEADER_SIZE + frame * as1130.FRAME_BYTES:]
+        as1130.encode_frame(fb._framebuffer, frame * FRAME_WIDTH, _width,
+                            FRAME_WIDTH, HEIGHT, onoff)
+    return bytes(blob)
+
+
+def compile_reel(titles, width, jobs):
+    # Blobs come back in title order whatever the number of workers
+    if jobs == 1:
+        _init_worker(width)
+        return [render_title(title) for title in titles]
+    with multiprocessing.Pool(jobs, _init_worker, (width,)) as pool:
+        return pool.map(render_title, titles, chunksize=max(1, len(titles) // (jobs * 4)))
+
+
+def write_reel(path, blobs, width, source):
+    index_offset = reel.HEADER_SIZE
+    offset = index_offset + 4 * len(blobs)
+    offsets = []
+    for blob in blobs:
+        offsets.append(offset)
+        offset += len(blob)
+
+    with open(path, 'wb') as f:
+        f.write(struct.pack(reel.HEADER, reel.MAGIC, reel.VERSION, as1130.FRAME_BYTES,
+                            HEIGHT, FRAME_WIDTH, len(blobs), width // FRAME_WIDTH,
+                            index_offset, len(source), binascii.crc32(source)))
+        f.write(struct.pack('<%dI' % len(offsets), *offsets))
+        for blob in blobs:
+            f.write(blob)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pre-render titles into a show reel')
+    parser.add_argument('titles', nargs='?', default=os.path.join(ROOT, 'show_titles.txt'),
+                        help='titles file, one title per line')
+    parser.add_argument('-o', '--output', default='show_reel.bin')
+    parser.add_argument('--width', type=int, default=24 * 8,
+                        help='framebuffer width, a multiple of 24 (default 192)')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='render processes (default: one per core)')
+    args = parser.parse_args()
+    if args.width % FRAME_WIDTH:
+        parser.error('--width must be a multiple of %d' % FRAME_WIDTH)
+
+    # Split into lines the way lib/titles.py indexes them
+    with open(args.titles, 'rb') as f:
+        source = f.read()
+    titles = [line.decode('utf-8').rstrip('\r') for line in source.split(b'\n')]
+    if titles and not titles[-1]:
+        titles.pop()
+    blobs = compile_reel(titles, args.width, max(1, args.jobs))
+    write_reel(args.output, blobs, args.width, source)
+    print('%d titles, %d bytes' % (len(blobs), os.path.getsize(args.output)))
+
+
+if __name__ == '__main__':
+    main()
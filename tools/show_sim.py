@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+#
+# Title show simulation
+#
+# Runs lib/show.py's tasks on CPython against the emulated AS1130 bus and
+# reports how well rendering and uploading keep up with the display
+# deadlines. A short --title-seconds puts the pipeline under pressure.
+#
+#   python3 tools/show_sim.py --seconds 5 --title-seconds 0.02
+#
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'lib'))
+
+import reel
+import show
+import titles
+from as1130_emulator import AS1130_Emulator
+
+
+async def simulate(titleshow, seconds):
+    try:
+        await asyncio.wait_for(titleshow.run(), seconds)
+    except asyncio.TimeoutError:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the title show against the emulated bus')
+    parser.add_argument('titles', nargs='?', default=os.path.join(ROOT, 'show_titles.txt'),
+                        help='titles file, one title per line')
+    parser.add_argument('--reel', help='show reel made by tools/make_reel.py')
+    parser.add_argument('--seconds', type=float, default=5.0, help='how long to run')
+    parser.add_argument('--title-seconds', type=float, default=0.05,
+                        help='time each title is shown (default 0.05)')
+    parser.add_argument('--shuffle', action='store_true')
+    args = parser.parse_args()
+
+    led = AS1130_Emulator()
+    with tempfile.TemporaryDirectory() as tmp:
+        titlesource = titles.TitleSource(args.titles, os.path.join(tmp, 'titles.idx'))
+        titlereel = reel.Reel(args.reel) if args.reel else None
+        titleshow = show.Show(led, titlesource, titlereel, shuffle=args.shuffle,
+                              title_seconds=args.title_seconds, start_seconds=0)
+        led.reset_counters()
+        asyncio.run(simulate(titleshow, args.seconds))
+        titlesource.close()
+
+    metrics = titleshow.metrics
+    shown = max(1, metrics['titles'])
+    print('%d titles shown, %d late' % (metrics['titles'], metrics['late']))
+    print('lateness        %8.2f ms mean %8.2f ms max' %
+          (1000 * metrics['lateness_total'] / shown, 1000 * metrics['lateness_max']))
+    print('render          %8.2f ms per title' % (1000 * metrics['render_time'] / shown))
+    print('upload          %8.2f ms per title, %d from the frame cache' %
+          (1000 * metrics['upload_time'] / shown, metrics['cache_hits']))
+    print('bus (400 kHz)   %8.2f ms per title, %d bytes' %
+          (1000 * led.bus_time / shown, led.bytes_sent))
+    print('busy            %8.1f %% of the run' %
+          (100 * (metrics['render_time'] + metrics['upload_time']) / args.seconds))
+
+
+if __name__ == '__main__':
+    main()